@@ -0,0 +1,49 @@
+"""Middleware API"""
+from django import http
+from django.utils.deprecation import MiddlewareMixin
+
+import base
+from apps import api
+
+
+class ApiTimingMiddleware(MiddlewareMixin):
+    """Время обработки запросов к BaseApiView: гистограммы по маршруту, версии API и методу
+
+    Результаты – в base.metrics.registry (метрика api_request_seconds).
+    Работает и в sync, и в async цепочке middleware (MiddlewareMixin).
+    """
+
+    metric_name = 'api_request_seconds'
+
+    def process_view(self, request: http.HttpRequest, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None)
+        if view_class is None or not issubclass(view_class, api.base.view.BaseApiView):
+            return None
+        request._api_timing = (
+            base.metrics.registry.histogram(
+                self.metric_name,
+                route=request.resolver_match.route,
+                **self._get_labels(request, view_class, view_kwargs)),
+            base.tools.Runtime(start=True))
+        return None
+
+    @staticmethod
+    def _get_labels(request: http.HttpRequest, view_class: type, view_kwargs: dict) -> dict[str, str]:
+        """Метки версии и метода – только из обслуживаемых view, иначе unknown
+
+        Значения приходят от клиента: без ограничения каждая новая версия/метод
+        создавали бы новую гистограмму (неограниченный рост памяти).
+        """
+        api_version = view_kwargs.get('api_version')
+        method = request.method.lower()
+        return {
+            'version': str(api_version) if api_version in view_class._allowed_methods else 'unknown',
+            'method': request.method if method in view_class.http_method_names else 'unknown',
+        }
+
+    def process_response(self, request: http.HttpRequest, response: http.HttpResponse):
+        timing = getattr(request, '_api_timing', None)
+        if timing is not None:
+            histogram, timer = timing
+            histogram.observe(timer.stop())
+        return response
@@ -0,0 +1,87 @@
+"""Реестр DTO контроллеров API
+
+Контроллеры регистрируются при создании класса (BaseApiViewController.__init_subclass__),
+autodiscover() при старте импортирует все модули контроллеров, т.е. создаёт
+pydantic-классы DTO (и их валидаторы), и один раз строит JSON-схемы
+DTO запроса/ответа/ошибки. Дальше схемы отдаются из реестра.
+"""
+import importlib
+import inspect
+import logging
+import pkgutil
+import threading
+
+import pydantic
+
+import base
+
+log = logging.getLogger(__name__)
+
+
+class DtoRegistry:
+
+    def __init__(self):
+        self._controllers: dict[str, type] = {}
+        self._schemas: dict[type[pydantic.BaseModel], dict] = {}
+        self._content: bytes | None = None
+        self._discovered = False
+        self._lock = threading.Lock()
+
+    def register(self, controller_cls: type):
+        """
+        :type controller_cls: type[apps.api.base.view.BaseApiViewController]
+        """
+        self._controllers[f'{controller_cls.__module__}.{controller_cls.__qualname__}'] = controller_cls
+        self._content = None
+
+    def autodiscover(self, package: str = 'apps.api', module_name: str = 'controller'):
+        """Импортирует модули контроллеров пакета и строит схемы их DTO"""
+        with self._lock:
+            if self._discovered:
+                return
+            package_module = importlib.import_module(package)
+            for module_info in pkgutil.walk_packages(package_module.__path__, prefix=f'{package}.'):
+                if module_info.name.rpartition('.')[2] == module_name:
+                    importlib.import_module(module_info.name)
+            for controller_cls in self.controllers().values():
+                for dto in self._get_dtos(controller_cls).values():
+                    self.schema(dto)
+            self._discovered = True
+        log.debug('DTO registry: %s controllers, %s schemas', len(self._controllers), len(self._schemas))
+
+    def controllers(self) -> dict[str, type]:
+        """Зарегистрированные (не абстрактные) контроллеры"""
+        return {
+            name: controller_cls for name, controller_cls in self._controllers.items()
+            if not inspect.isabstract(controller_cls)}
+
+    def schema(self, dto: type[pydantic.BaseModel]) -> dict:
+        """JSON-схема DTO (строится один раз)"""
+        try:
+            return self._schemas[dto]
+        except KeyError:
+            schema = self._schemas[dto] = dto.schema()
+            return schema
+
+    def as_dict(self) -> dict[str, dict[str, dict]]:
+        """Схемы DTO всех контроллеров: {контроллер: {request/response/error: схема}}"""
+        return {
+            name: {kind: self.schema(dto) for kind, dto in self._get_dtos(controller_cls).items()}
+            for name, controller_cls in self.controllers().items()}
+
+    def render(self) -> bytes:
+        """Схемы всех контроллеров в JSON (сериализуются один раз)"""
+        if self._content is None:
+            self._content = base.tools.render_json(base.web.BaseViewResponse(data=self.as_dict()))
+        return self._content
+
+    @staticmethod
+    def _get_dtos(controller_cls: type) -> dict[str, type[pydantic.BaseModel]]:
+        return {
+            'request': controller_cls._request_dto,
+            'response': controller_cls._response_dto,
+            'error': controller_cls._error_dto,
+        }
+
+
+registry = DtoRegistry()
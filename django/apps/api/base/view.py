@@ -5,33 +5,98 @@ View вызывает метод обработки контроллера, во
 """
 
 import abc
+import asyncio
+import datetime
+import functools
+import hashlib
+import inspect
 import logging
+import re
 import typing
 
 import pydantic
+from asgiref.sync import sync_to_async
 from django import http
 from django import views
+from django.utils.cache import get_conditional_response
+from django.utils.decorators import classonlymethod
+from django.utils.http import http_date
 
 import base
+from apps import api
 
 log = logging.getLogger(__name__)
 
 
+_HANDLER_NAME = re.compile(r'(?P<method>[a-z]+)_v(?P<version>[0-9]+)')
+
+
 class BaseApiView(views.View):
+    """Базовый view API с версионированием
 
-    @base.tools.json_response
-    def get(self, request: http.HttpRequest, api_version: int, *args, **kwargs):
-        try:
-            return getattr(self, f'get_v{int(api_version)}')(request, *args, **kwargs)
-        except (AttributeError, ValueError) as e:
-            return base.web.BaseViewError(status=404).add(f'{api_version} not found', e)
+    Обработчики – методы {http-метод}_v{версия} (get_v1, post_v2, …), в т.ч.
+    унаследованные view отдельных версий (см. api.order.view.OrderView).
+    Таблица {метод: {версия: обработчик}} строится один раз при создании класса,
+    по ней же отвечают 404 (нет версии), 405 с Allow (нет метода в версии),
+    OPTIONS и HEAD (как GET).
+    """
+
+    _handlers: typing.ClassVar[dict[str, dict[int, typing.Callable]]] = {}
+    _allowed_methods: typing.ClassVar[dict[int, str]] = {}  # версия: значение заголовка Allow
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        handlers = {}
+        for name in dir(cls):
+            match = _HANDLER_NAME.fullmatch(name)
+            if match is not None and match['method'] in cls.http_method_names:
+                handlers.setdefault(match['method'], {})[int(match['version'])] = getattr(cls, name)
+        if 'get' in handlers:
+            handlers.setdefault('head', handlers['get'])
+        cls._handlers = handlers
+        versions = sorted({version for method_handlers in handlers.values() for version in method_handlers})
+        cls._allowed_methods = {
+            version: ', '.join(
+                method.upper() for method in cls.http_method_names
+                if method == 'options' or version in handlers.get(method, {}))
+            for version in versions}
 
     @base.tools.json_response
-    def post(self, request: http.HttpRequest, api_version: int, *args, **kwargs):
+    def dispatch(self, request: http.HttpRequest, *args, api_version: int = None, **kwargs):
+        handler = self._get_handler(request, api_version)
+        if handler is None:
+            return self._options_response(api_version)
+        return handler(self, request, *args, **kwargs)
+
+    @typing.final
+    def _get_handler(self, request: http.HttpRequest, api_version: int) -> typing.Callable | None:
+        """Обработчик метода запроса для версии (None – OPTIONS)
+
+        :raises base.exc.ViewResponse: 404 – нет такой версии, 405 – нет метода в версии
+        """
+        allowed_methods = self._allowed_methods.get(api_version)
+        if allowed_methods is None:
+            raise base.exc.ViewResponse(
+                'Версия API не найдена',
+                base.web.BaseViewError(status=404).add(f'{api_version=} not found'),
+                status=404)
+        method = request.method.lower()
+        if method == 'options':
+            return None
         try:
-            return getattr(self, f'post_v{int(api_version)}')(request, *args, **kwargs)
-        except (AttributeError, ValueError) as e:
-            return base.web.BaseViewError(status=404).add(f'{api_version=} not found', e)
+            return self._handlers[method][api_version]
+        except KeyError:
+            raise base.exc.ViewResponse(
+                'Метод не поддерживается',
+                base.web.BaseViewError(status=405).add(f'{request.method} not allowed for {api_version=}'),
+                status=405, headers={'Allow': allowed_methods}) from None
+
+    @typing.final
+    def _options_response(self, api_version: int) -> http.HttpResponse:
+        response = http.HttpResponse()
+        response['Allow'] = self._allowed_methods[api_version]
+        response['Content-Length'] = '0'
+        return response
 
     # def get_v1(self, request: http.HttpRequest, *args, **kwargs) -> http.HttpResponse:
     #     raise NotImplementedError
@@ -40,6 +105,55 @@ class BaseApiView(views.View):
     #     raise NotImplementedError
 
 
+class BaseAsyncApiView(BaseApiView):
+    """Async-вариант BaseApiView (для работы под ASGI без sync→thread адаптера)
+
+    Обработчики get_vN/post_vN могут быть как async, так и обычными:
+    синхронные выполняются через sync_to_async, т.к. могут обращаться к БД.
+    """
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        # View.as_view() возвращает обычную функцию, которая лишь создаёт корутину dispatch();
+        # обёртка-корутина нужна, чтобы ASGI-обработчик вызывал view без sync→thread адаптера
+        view = super().as_view(**initkwargs)
+
+        async def async_view(request, *args, **kwargs):
+            return await view(request, *args, **kwargs)  # dispatch() – корутина
+
+        functools.update_wrapper(async_view, view)
+        return async_view
+
+    @base.tools.json_response
+    async def dispatch(self, request: http.HttpRequest, *args, api_version: int = None, **kwargs):
+        handler = self._get_handler(request, api_version)
+        if handler is None:
+            return self._options_response(api_version)
+        return await self._call_handler(handler.__get__(self), request, *args, **kwargs)
+
+    @staticmethod
+    async def _call_handler(handler: typing.Callable, request: http.HttpRequest, *args, **kwargs):
+        if asyncio.iscoroutinefunction(handler):
+            return await handler(request, *args, **kwargs)
+        result = await sync_to_async(handler)(request, *args, **kwargs)
+        if inspect.isawaitable(result):
+            # Синхронный get_vN вернул корутину async-контроллера
+            result = await result
+        return result
+
+
+class Freshness(typing.NamedTuple):
+    """Признаки актуальности ресурса для условных запросов (ETag/Last-Modified)
+
+    last_modified – например max(modified_at) запрошенных записей CrUpModel,
+    token – всё остальное, что меняет ответ (например количество записей,
+    чтобы заметить удаление). Token учитывается только в ETag, поэтому
+    при непустом token If-Modified-Since не даёт 304 (только If-None-Match).
+    """
+    last_modified: datetime.datetime | None
+    token: str = ''
+
+
 class BaseApiViewController(abc.ABC):
     """Базовый класс контроллера вьюхи
 
@@ -52,9 +166,14 @@ class BaseApiViewController(abc.ABC):
     _request_dto: type[base.web.BaseViewRequest] = base.web.BaseViewRequest
     _response_dto: type[base.web.BaseViewResponse] = base.web.BaseViewResponse
     _error_dto: type[base.web.BaseViewError] = base.web.BaseViewError
+    _cache: base.cache.ResponseCache | None = None  # кэш ответов (opt-in)
 
     input_data: _request_dto
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        api.base.registry.registry.register(cls)
+
     def __init__(self, request: http.HttpRequest):
         self.request = request
         self.input_data = self._get_request_dto()
@@ -64,14 +183,99 @@ class BaseApiViewController(abc.ABC):
         """Обрабатывает запрос"""
         raise NotImplementedError
 
+    def get_freshness(self) -> Freshness | None:
+        """Дешёвая проверка актуальности ресурса (выполняется до handle_request)
+
+        Если переопределена – ответ получает ETag/Last-Modified, а на
+        If-None-Match/If-Modified-Since с неизменившимся ресурсом
+        возвращается 304 без выполнения handle_request и сериализации.
+        """
+        return None
+
+    def respond(self) -> http.HttpResponse | _response_dto:
+        """Обрабатывает запрос с учётом условного GET (get_freshness) и кэша ответов (_cache)"""
+        freshness = self.get_freshness()
+        if freshness is None:
+            return self._respond()
+        etag = self._get_etag(freshness)
+        not_modified = self._get_not_modified_response(freshness, etag)
+        if not_modified is not None:
+            return not_modified
+        return self._set_validators(self._respond(), freshness, etag)
+
+    def _respond(self) -> http.HttpResponse | _response_dto:
+        """Обрабатывает запрос с учётом кэша ответов (если задан _cache)
+
+        При попадании в кэш handle_request и сериализация не выполняются.
+        """
+        if self._cache is None:
+            return self.handle_request()
+        key = self._get_cache_key()
+        content = self._cache.get(key)
+        if content is None:
+            response_dto = self.handle_request()
+            if isinstance(response_dto, base.web.BaseViewError):
+                return response_dto  # ошибки не кэшируем
+            content = base.tools.render_json(response_dto)
+            self._cache.set(key, content)
+        return http.HttpResponse(content, content_type='application/json')
+
+    @typing.final
+    def _get_etag(self, freshness: Freshness) -> str:
+        api_version = self._response_dto.__fields__['version'].default
+        last_modified = freshness.last_modified.isoformat() if freshness.last_modified else ''
+        digest = hashlib.sha1('\n'.join((
+            f'{self.__class__.__module__}:{api_version}',
+            self.input_data.json(sort_keys=True),
+            last_modified,
+            freshness.token,
+        )).encode()).hexdigest()
+        return f'W/"{digest}"'
+
+    @typing.final
+    def _get_not_modified_response(self, freshness: Freshness, etag: str) -> http.HttpResponse | None:
+        """304 (или 412), если ресурс не изменился с версии клиента"""
+        last_modified = None
+        if freshness.last_modified is not None and not freshness.token:
+            last_modified = int(freshness.last_modified.timestamp())
+        response = get_conditional_response(self.request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            self._set_validators(response, freshness, etag)
+        return response
+
+    @staticmethod
+    def _set_validators(
+            result: http.HttpResponse | base.web.BaseViewResponse,
+            freshness: Freshness, etag: str) -> http.HttpResponse | base.web.BaseViewResponse:
+        if isinstance(result, base.web.BaseViewError):
+            return result  # ошибки без валидаторов
+        if isinstance(result, base.web.BaseViewResponse):
+            result = base.tools.render_json_response(result)
+        result['ETag'] = etag
+        if freshness.last_modified is not None:
+            result['Last-Modified'] = http_date(freshness.last_modified.timestamp())
+        return result
+
+    @typing.final
+    def _get_cache_key(self) -> str:
+        api_version = self._response_dto.__fields__['version'].default
+        return self._cache.make_key(self.__class__, api_version, self.input_data)
+
     def parse_input_data(self) -> _request_dto:
         """Парсит входящие данные запроса"""
         return self._parse_input_data_from_get()
 
     @typing.final
     def _parse_input_data_from_get(self) -> _request_dto:
-        """Парсит входящие данные GET-запроса"""
-        return self._request_dto.parse_obj(self.request.GET.dict())
+        """Парсит входящие данные GET-запроса
+
+        Параметры, которые в DTO списки, берутся целиком (?id=1&id=2).
+        """
+        data = self.request.GET.dict()
+        for field in self._request_dto.__fields__.values():
+            if field.shape != pydantic.fields.SHAPE_SINGLETON and field.alias in self.request.GET:
+                data[field.alias] = self.request.GET.getlist(field.alias)
+        return self._request_dto.parse_obj(data)
 
     @typing.final
     def _parse_input_data_from_post(self) -> _request_dto:
@@ -83,7 +287,52 @@ class BaseApiViewController(abc.ABC):
         try:
             return self.parse_input_data()
         except pydantic.ValidationError as e:
-            error_dto = self._error_dto(status=400, request_structure=self._request_dto.schema())
+            error_dto = self._error_dto(
+                status=400,
+                request_structure=api.base.registry.registry.schema(self._request_dto))
             raise base.exc.ViewResponse(
                 'Некорректные параметры запроса',
                 response_dto=error_dto.add(*str(e).splitlines())) from e
+
+
+class BaseAsyncApiViewController(BaseApiViewController):
+    """Базовый класс async-контроллера вьюхи
+
+    Используется из BaseAsyncApiView:
+    >>> async def get_v1(self, request):
+    >>>     return await ViewController(request).respond()
+    """
+
+    @abc.abstractmethod
+    async def handle_request(self) -> base.web.BaseViewResponse:
+        """Обрабатывает запрос"""
+        raise NotImplementedError
+
+    async def get_freshness(self) -> Freshness | None:
+        """См. BaseApiViewController.get_freshness()"""
+        return None
+
+    async def respond(self) -> http.HttpResponse | base.web.BaseViewResponse:
+        """Обрабатывает запрос с учётом условного GET (get_freshness) и кэша ответов (_cache)"""
+        freshness = await self.get_freshness()
+        if freshness is None:
+            return await self._respond()
+        etag = self._get_etag(freshness)
+        not_modified = self._get_not_modified_response(freshness, etag)
+        if not_modified is not None:
+            return not_modified
+        return self._set_validators(await self._respond(), freshness, etag)
+
+    async def _respond(self) -> http.HttpResponse | base.web.BaseViewResponse:
+        """Обрабатывает запрос с учётом кэша ответов (если задан _cache)"""
+        if self._cache is None:
+            return await self.handle_request()
+        key = self._get_cache_key()
+        content = self._cache.get(key)
+        if content is None:
+            response_dto = await self.handle_request()
+            if isinstance(response_dto, base.web.BaseViewError):
+                return response_dto  # ошибки не кэшируем
+            content = base.tools.render_json(response_dto)
+            self._cache.set(key, content)
+        return http.HttpResponse(content, content_type='application/json')
@@ -0,0 +1,13 @@
+from django import http
+from django import views
+
+import base
+
+
+class MetricsView(views.View):
+    """Метрики (base.metrics.registry) в текстовом формате Prometheus"""
+
+    def get(self, request: http.HttpRequest) -> http.HttpResponse:
+        return http.HttpResponse(
+            base.metrics.registry.exposition(),
+            content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,16 +1,10 @@
-import importlib
+from base import lazy
 
 __all__ = [
     'v1',
+    'v2',
+    'v3',
     'view',
 ]
 
-
-def __getattr__(name):
-    """Lazy import
-
-    https://peps.python.org/pep-0562/#rationale
-    """
-    if name in __all__:
-        return importlib.import_module("." + name, __name__)
-    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+__getattr__ = lazy.attach(__name__, __all__)
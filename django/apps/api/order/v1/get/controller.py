@@ -1,3 +1,4 @@
+import base
 from apps import api
 
 
@@ -5,6 +6,7 @@ class ViewController(api.base.view.BaseApiViewController):
 
     _request_dto = api.order.v1.get.request.Root
     _response_dto = api.order.v1.get.response.Root
+    _cache = base.cache.ResponseCache(ttl=5, backend='api')  # инвалидация – apps.order.apps
 
     input_data: _request_dto
 
@@ -0,0 +1,9 @@
+from base import lazy
+
+__all__ = [
+    'controller',
+    'request',
+    'response',
+]
+
+__getattr__ = lazy.attach(__name__, __all__)
@@ -0,0 +1,32 @@
+import base
+from apps import api
+from apps import order
+
+
+class ViewController(api.base.view.BaseApiViewController):
+
+    _request_dto = api.order.v2.get.request.Root
+    _response_dto = api.order.v2.get.response.Root
+
+    input_data: _request_dto
+
+    def get_freshness(self) -> api.base.view.Freshness:
+        last_modified, count = order.repository.OrderRepository().get_freshness(self.input_data.id)
+        return api.base.view.Freshness(last_modified, token=str(count))
+
+    def handle_request(self) -> _response_dto:
+        found = order.repository.OrderRepository().get_by_ids(self.input_data.id)
+        orders = {order_id: found.get(order_id) for order_id in self.input_data.id}
+        not_found = [order_id for order_id, order_dto in orders.items() if order_dto is None]
+        if not found:
+            status = base.web.ViewResponseStatus.NOT_FOUND
+        elif not_found:
+            status = base.web.ViewResponseStatus.PARTIAL_SUCCESS
+        else:
+            status = base.web.ViewResponseStatus.OK
+        return self._response_dto(status=status, data={
+            'orders': {
+                order_id: None if order_dto is None else order_dto.dict()
+                for order_id, order_dto in orders.items()},
+            'not_found': not_found,
+        })
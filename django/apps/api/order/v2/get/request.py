@@ -0,0 +1,10 @@
+import pydantic
+
+import base
+
+
+class Root(base.web.BaseViewRequest):
+    """Запрос (client → api) на поиск нескольких заказов (?id=1&id=2&…)"""
+    id: list[int] = pydantic.Field(
+        title='id заказов', min_items=1,
+        max_items=500)  # все id выбираются одним запросом (см. OrderRepository.chunk_size)
@@ -0,0 +1,22 @@
+import typing
+
+import pydantic
+
+import base
+
+
+class Order(pydantic.BaseModel):
+    id: int
+    name: str
+
+
+class Data(pydantic.BaseModel):
+    orders: dict[int, typing.Optional[Order]] = pydantic.Field(
+        {}, description='Заказы по запрошенным id (null – не найден)')
+    not_found: list[int] = []
+
+
+class Root(base.web.BaseViewResponse):
+    """Ответ (api → client)"""
+    version: int = 2
+    data: Data = pydantic.Field(default_factory=Data)
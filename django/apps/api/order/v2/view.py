@@ -0,0 +1,9 @@
+from django import http
+
+from apps import api
+
+
+class OrderView(api.base.view.BaseApiView):
+
+    def get_v2(self, request: http.HttpRequest) -> http.HttpResponse:
+        return api.order.v2.get.controller.ViewController(request).respond()
@@ -0,0 +1,8 @@
+from base import lazy
+
+__all__ = [
+    'get',
+    'view',
+]
+
+__getattr__ = lazy.attach(__name__, __all__)
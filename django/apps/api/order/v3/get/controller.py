@@ -0,0 +1,85 @@
+import csv
+import datetime
+import io
+import typing
+
+from django import http
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+import base
+from apps import api
+from apps import order
+
+
+_json_encoder = DjangoJSONEncoder()
+
+
+class ViewController(api.base.view.BaseApiViewController):
+    """Потоковая выгрузка заказов (NDJSON или CSV)
+
+    Записи читаются из БД итератором (server-side cursor) пачками по chunk_size,
+    каждая пачка сериализуется (поля записи – _row_dto) и сразу
+    отдаётся клиенту, т.е. память не зависит от объёма выгрузки.
+    """
+
+    _request_dto = api.order.v3.get.request.Root
+    _response_dto = api.order.v3.get.response.Root
+    _row_dto = api.order.v3.get.response.Row
+
+    chunk_size = 2000
+
+    input_data: _request_dto
+
+    def handle_request(self) -> http.StreamingHttpResponse:
+        repository = order.repository.OrderRepository()
+        repository.chunk_size = self.chunk_size
+        dtos = repository.iter_dto(self.get_queryset(repository))
+        if self.input_data.format == api.order.v3.get.request.Format.CSV:
+            content, content_type = self.render_csv(dtos), 'text/csv; charset=utf-8'
+        else:
+            content, content_type = self.render_ndjson(dtos), 'application/x-ndjson'
+        response = http.StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="orders.{self.input_data.format.value}"'
+        return response
+
+    def get_queryset(self, repository: order.repository.OrderRepository) -> models.QuerySet:
+        filters = {
+            'created_at__gte': self.input_data.created_from,
+            'created_at__lt': self.input_data.created_to,
+            'modified_at__gte': self.input_data.modified_from,
+            'modified_at__lt': self.input_data.modified_to,
+            'user_id__in': self.input_data.user or None,
+        }
+        return repository.get_queryset().filter(
+            **{lookup: value for lookup, value in filters.items() if value is not None}
+        ).order_by('pk')
+
+    def render_ndjson(self, dtos: typing.Iterable[order.dto.Order]) -> typing.Iterator[bytes]:
+        fields = set(self._row_dto.__fields__)
+        for chunk in base.tools.chunked(dtos, self.chunk_size):
+            yield b''.join(base.tools.json_dumps(dto.dict(include=fields)) + b'\n' for dto in chunk)
+
+    def render_csv(self, dtos: typing.Iterable[order.dto.Order]) -> typing.Iterator[bytes]:
+        fields = list(self._row_dto.__fields__)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        for chunk in base.tools.chunked(dtos, self.chunk_size):
+            for dto in chunk:
+                values = dto.dict()
+                writer.writerow([self._csv_value(values[field]) for field in fields])
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()  # выгрузка пустая – только заголовок
+
+    @staticmethod
+    def _csv_value(value: typing.Any) -> typing.Any:
+        """Значение колонки CSV: даты – в том же ISO 8601, что и в JSON"""
+        if value is None:
+            return ''
+        if isinstance(value, (datetime.date, datetime.time)):
+            return _json_encoder.default(value)
+        return value
@@ -0,0 +1,25 @@
+import datetime
+import enum
+import typing
+
+import pydantic
+
+import base
+
+
+class Format(str, enum.Enum):
+    NDJSON = 'ndjson'
+    CSV = 'csv'
+
+
+class Root(base.web.BaseViewRequest):
+    """Запрос (client → api) на выгрузку заказов (?format=csv&created_from=…&user=1&user=2)
+
+    Интервалы дат – полуоткрытые: from <= дата < to.
+    """
+    format: Format = pydantic.Field(Format.NDJSON, title='Формат выгрузки')
+    created_from: typing.Optional[datetime.datetime] = pydantic.Field(None, title='Создан не ранее')
+    created_to: typing.Optional[datetime.datetime] = pydantic.Field(None, title='Создан ранее')
+    modified_from: typing.Optional[datetime.datetime] = pydantic.Field(None, title='Изменён не ранее')
+    modified_to: typing.Optional[datetime.datetime] = pydantic.Field(None, title='Изменён ранее')
+    user: list[int] = pydantic.Field([], title='id пользователей')
@@ -0,0 +1,27 @@
+import datetime
+import typing
+
+import pydantic
+
+import base
+
+
+class Row(pydantic.BaseModel):
+    """Запись выгрузки: объект в строке NDJSON, строка CSV (колонки – поля в этом порядке)
+
+    Даты в обоих форматах – ISO 8601.
+    """
+    id: int
+    name: str
+    user_id: typing.Optional[int] = None
+    created_at: datetime.datetime
+    modified_at: datetime.datetime
+
+
+class Root(base.web.BaseViewResponse):
+    """Ответ (api → client) – поток записей Row
+
+    Сам Root не отдаётся: он задаёт версию и схему выгрузки (реестр DTO, /api/schema/).
+    """
+    version: int = 3
+    data: list[Row] = []
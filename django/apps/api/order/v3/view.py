@@ -0,0 +1,9 @@
+from django import http
+
+from apps import api
+
+
+class OrderView(api.base.view.BaseApiView):
+
+    def get_v3(self, request: http.HttpRequest) -> http.StreamingHttpResponse:
+        return api.order.v3.get.controller.ViewController(request).respond()
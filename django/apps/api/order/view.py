@@ -1,7 +1,10 @@
 from apps import api
 
 
-class OrderView(api.order.v1.view.OrderView):
+class OrderView(
+        api.order.v3.view.OrderView,
+        api.order.v2.view.OrderView,
+        api.order.v1.view.OrderView):
     """Общий view для всех версий
 
     View всех версий подключаются сюда через множественное наследование.
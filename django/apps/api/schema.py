@@ -0,0 +1,15 @@
+from django import http
+from django import views
+
+from apps import api
+
+
+class SchemaView(views.View):
+    """JSON-схемы DTO запросов/ответов/ошибок всех контроллеров API
+
+    Схемы строятся один раз (см. api.base.registry).
+    """
+
+    def get(self, request: http.HttpRequest) -> http.HttpResponse:
+        api.base.registry.registry.autodiscover()
+        return http.HttpResponse(api.base.registry.registry.render(), content_type='application/json')
@@ -3,6 +3,13 @@ from django.urls import path
 from apps import api
 
 urlpatterns = [
+    path('metrics/',
+         api.metrics.MetricsView.as_view()),
+    path('schema/',
+         api.schema.SchemaView.as_view()),
     path('v<int:api_version>/order/',
          api.order.view.OrderView.as_view()),
 ]
+
+# Схемы DTO строятся при загрузке urlconf, а не на первом же 400-м ответе
+api.base.registry.registry.autodiscover()
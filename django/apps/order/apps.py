@@ -1,7 +1,14 @@
 from django.apps import AppConfig
 
+import base
+
 
 class OrderConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.order'
     verbose_name = ' Заказы'
+
+    def ready(self):
+        # Кэш ответов API заказов (apps.api.order) сбрасывается при любом изменении
+        # заказов в любом процессе, даже если контроллеры в нём не импортированы
+        base.cache.invalidate_on_change(self.get_model('Order'), backend='api')
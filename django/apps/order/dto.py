@@ -1,5 +1,11 @@
+import datetime
+import typing
+
 import base
 
 
 class Order(base.db.BaseDbDto):
     name: str
+    user_id: typing.Optional[int] = None
+    created_at: datetime.datetime = None
+    modified_at: datetime.datetime = None
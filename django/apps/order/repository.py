@@ -0,0 +1,9 @@
+import base
+from apps import order
+
+
+class OrderRepository(base.db.BaseRepository):
+    """Репозиторий заказов"""
+
+    model = order.models.Order
+    dto = order.dto.Order
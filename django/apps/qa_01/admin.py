@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+import base
 from apps.qa_01.models import Author
 from apps.qa_01.models import Book
 from apps.qa_01.models import Language
@@ -9,16 +10,28 @@ from apps.qa_01.models import Language
 class BookAdmin(admin.ModelAdmin):
     list_display = [
         'title',
-        lambda o: ', '.join(map(str, o.authors.all())),
-        lambda o: ', '.join(map(str, o.available_languages.all())),
+        'authors_display',
+        'available_languages_display',
     ]
 
+    def get_queryset(self, request):
+        # M2M-колонки одним запросом на колонку, а не на каждую строку
+        return super().get_queryset(request).prefetch_related('authors', 'available_languages')
+
+    @base.db.admin_display(desc='Авторы')
+    def authors_display(self, obj: Book) -> str:
+        return ', '.join(map(str, obj.authors.all()))
+
+    @base.db.admin_display(desc='Языки')
+    def available_languages_display(self, obj: Book) -> str:
+        return ', '.join(map(str, obj.available_languages.all()))
+
 
 @admin.register(Author)
-class BookAdmin(admin.ModelAdmin):
+class AuthorAdmin(admin.ModelAdmin):
     pass
 
 
 @admin.register(Language)
-class BookAdmin(admin.ModelAdmin):
+class LanguageAdmin(admin.ModelAdmin):
     pass
@@ -1,5 +1,6 @@
 from django.db import migrations
 
+import base
 from apps.qa_01 import models
 
 
@@ -7,26 +8,33 @@ def custom_migration(apps, schema_editor):
     Book: models.Book = apps.get_model('qa_01', 'Book')
     Author: models.Author = apps.get_model('qa_01', 'Author')
     Language: models.Language = apps.get_model('qa_01', 'Language')
+    using = schema_editor.connection.alias
 
-    lang_s = Language.objects.get(name__iexact='Суахили')
-    books = Book.objects.filter(
+    # Вне транзакции чтение через objects ушло бы в (отстающую) реплику
+    lang_s = Language.objects.db_manager(using).get(name__iexact='Суахили')
+    book_ids = Book.objects.db_manager(using).filter(
         authors__in=[
-            Author.objects.get(
+            Author.objects.db_manager(using).get(
                 first_name__iexact='Аркадий',
                 last_name__iexact='Стругацкий',
             ),
-            Author.objects.get(
+            Author.objects.db_manager(using).get(
                 first_name__iexact='Борис',
                 last_name__iexact='Стругацкий',
             ),
         ]
-    ).distinct()
-    for book in books:
-        book.available_languages.add(lang_s)
+    ).values_list('id', flat=True).distinct()
+    # Связи – пачками через through-таблицу, а не book.available_languages.add() на каждую книгу
+    base.data_migration.bulk_link_m2m(
+        Book, 'available_languages',
+        ((book_id, lang_s.id) for book_id in book_ids.iterator()),
+        using=using)
 
 
 class Migration(migrations.Migration):
 
+    atomic = False  # пачки коммитятся по отдельности
+
     dependencies = [
         ('qa_01', '0002_custom_add1'),
     ]
@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.qa_01.models import Author
+from apps.qa_01.models import Book
+from apps.qa_01.models import Language
+
+
+class BookAdminChangelistTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'admin')
+        cls.author = Author.objects.create(first_name='Иван', last_name='Ефремов', birth_date='1908-04-22')
+        cls.language = Language.objects.create(name='Эсперанто')
+
+    def _create_books(self, count: int):
+        for i in range(count):
+            book = Book.objects.create(title=f'Книга {i}')
+            book.authors.add(self.author)
+            book.available_languages.add(self.language)
+
+    def _count_changelist_queries(self) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/qa_01/book/')
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        self.client.force_login(self.user)
+        self._create_books(3)
+        queries_few = self._count_changelist_queries()
+        self._create_books(30)
+        queries_many = self._count_changelist_queries()
+        self.assertEqual(queries_few, queries_many)
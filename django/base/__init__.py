@@ -1,19 +1,15 @@
-import importlib
-
 from . import exceptions as exc
+from . import lazy
 
 __all__ = [
     'web',
     'tools',
     'db',
+    'cache',
+    'metrics',
+    'data_migration',
+    'db_router',
+    'log',
 ]
 
-
-def __getattr__(name):
-    """Lazy import
-
-    https://peps.python.org/pep-0562/#rationale
-    """
-    if name in __all__:
-        return importlib.import_module("." + name, __name__)
-    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+__getattr__ = lazy.attach(__name__, __all__)
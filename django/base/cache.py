@@ -0,0 +1,159 @@
+"""Кэш ответов API-контроллеров
+
+Ключ кэша строится из класса контроллера, версии API и уже провалидированного
+DTO входных данных, поэтому одинаковые по смыслу запросы (например с разным
+порядком GET-параметров) попадают в одну запись.
+"""
+import collections
+import hashlib
+import threading
+import time
+import typing
+import uuid
+import weakref
+
+from django.core.cache import caches
+from django.db.models import signals
+
+_DEFAULT = object()
+
+# ResponseCache с in-memory кэшем процесса (для invalidate(backend=None))
+_local_caches: 'weakref.WeakSet[ResponseCache]' = weakref.WeakSet()
+
+
+class LruTtlCache:
+    """Потокобезопасный in-memory кэш процесса с TTL и вытеснением LRU
+
+    Интерфейс get/set совместим с кэшами django.
+    """
+
+    def __init__(self, *, maxsize: int = 1024, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: collections.OrderedDict[str, tuple[float, typing.Any]] = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str, default: typing.Any = None) -> typing.Any:
+        with self._lock:
+            try:
+                expires_at, value = self._data[key]
+            except KeyError:
+                return default
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: typing.Any, timeout: float | None = _DEFAULT):
+        """Сохраняет значение
+
+        :param timeout: время жизни (секунды), None – бессрочно
+        """
+        if timeout is _DEFAULT:
+            timeout = self.ttl
+        expires_at = float('inf') if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class ResponseCache:
+    """Кэш (сериализованных) ответов контроллера
+
+    >>> class ViewController(api.base.view.BaseApiViewController):
+    >>>     _cache = base.cache.ResponseCache(ttl=5, backend='api')
+
+    Инвалидация – сменой «поколения» кэша (invalidate()): старые записи
+    просто перестают находиться и вытесняются по TTL/LRU. Поколение хранится
+    в самом бэкенде, поэтому с общим бэкендом (например file) инвалидация
+    видна всем процессам. При изменении моделей поколение меняют обработчики
+    сигналов, подключенные в AppConfig.ready() через invalidate_on_change().
+    """
+
+    def __init__(
+            self, *, ttl: float = 30, maxsize: int = 1024, backend: str = None, prefix: str = 'api'):
+        """
+        :param ttl: время жизни записи (секунды)
+        :param maxsize: размер in-memory LRU-кэша (если backend не указан)
+        :param backend: alias кэша из settings.CACHES (например locmem/file);
+            если не указан – используется in-memory LruTtlCache процесса
+        :param prefix: префикс ключей (кэши с одним префиксом и бэкендом
+            инвалидируются вместе)
+        """
+        self.ttl = ttl
+        self.backend_alias = backend
+        self.prefix = prefix
+        self._local = LruTtlCache(maxsize=maxsize, ttl=ttl) if backend is None else None
+        self._generation_key = f'{prefix}:generation'
+        if self._local is not None:
+            _local_caches.add(self)
+
+    @property
+    def backend(self):
+        if self._local is not None:
+            return self._local
+        return caches[self.backend_alias]
+
+    def make_key(self, controller_cls: type, api_version: int, input_data) -> str:
+        """
+        :type input_data: base.web.BaseViewRequest
+        """
+        input_hash = hashlib.sha1(input_data.json(sort_keys=True).encode()).hexdigest()
+        controller = f'{controller_cls.__module__}.{controller_cls.__qualname__}'
+        return f'{self.prefix}:{controller}:v{api_version}:{self._get_generation()}:{input_hash}'
+
+    def get(self, key: str) -> bytes | None:
+        return self.backend.get(key)
+
+    def set(self, key: str, content: bytes):
+        self.backend.set(key, content, self.ttl)
+
+    def invalidate(self):
+        """Инвалидирует все записи кэша"""
+        self.backend.set(self._generation_key, uuid.uuid4().hex[:8], None)
+
+    def _get_generation(self) -> str:
+        generation = self.backend.get(self._generation_key)
+        if generation is None:
+            # Поколение – случайное: если его вытеснят, старые записи не «оживут»
+            generation = uuid.uuid4().hex[:8]
+            self.backend.set(self._generation_key, generation, None)
+        return generation
+
+
+def invalidate(*, backend: str = None, prefix: str = 'api'):
+    """Инвалидирует кэши ответов с префиксом prefix
+
+    :param backend: alias кэша из settings.CACHES, None – in-memory кэши процесса
+    """
+    if backend is not None:
+        ResponseCache(backend=backend, prefix=prefix).invalidate()
+        return
+    for cache in list(_local_caches):
+        if cache.prefix == prefix:
+            cache.invalidate()
+
+
+def invalidate_on_change(*models: str | type, backend: str = None, prefix: str = 'api'):
+    """Инвалидирует кэши ответов при post_save/post_delete записей моделей
+
+    Вызывается из AppConfig.ready(): так обработчики подключены в любом
+    процессе (команды, воркеры, админка), а не только там, где импортирован контроллер.
+    :param models: модели ('app_label.Model' или класс)
+    """
+    def on_model_change(sender, **kwargs):
+        invalidate(backend=backend, prefix=prefix)
+
+    for model in models:
+        for signal in (signals.post_save, signals.post_delete):
+            signal.connect(on_model_change, sender=model, weak=False, dispatch_uid=f'{__name__}:{backend}:{prefix}')
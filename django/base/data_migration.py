@@ -0,0 +1,120 @@
+"""Пакетные (set-based) помощники для data-миграций (RunPython)
+
+Вместо objects.create()/m2m.add() на каждую запись – bulk-операции пачками
+по chunk_size, каждая пачка в своей транзакции. Чтобы пачки действительно
+коммитились по отдельности (и большой backfill не держал одну огромную
+транзакцию и блокировки), у миграции должно быть atomic = False:
+
+>>> def forwards(apps, schema_editor):
+>>>     Book = apps.get_model('qa_01', 'Book')
+>>>     base.data_migration.bulk_link_m2m(
+>>>         Book, 'available_languages', ((book_id, lang_id) for book_id in book_ids),
+>>>         using=schema_editor.connection.alias)
+>>>
+>>> class Migration(migrations.Migration):
+>>>     atomic = False
+>>>     operations = [migrations.RunPython(forwards)]
+
+Чтения в RunPython тоже нужно направлять в БД миграции
+(Model.objects.db_manager(schema_editor.connection.alias) или .using(alias)):
+вне транзакции роутер отправил бы их в реплику, которая может отставать.
+
+Модели передаются историческими (apps.get_model), поэтому здесь ничего
+из приложений не импортируется.
+"""
+import logging
+import typing
+
+from django.db import models
+from django.db import router
+from django.db import transaction
+
+import base
+
+log = logging.getLogger(__name__)
+
+
+def bulk_create_chunked(
+        model: type[models.Model], objs: typing.Iterable[models.Model], *,
+        chunk_size: int = 1000, ignore_conflicts: bool = False, using: str = None) -> int:
+    """Создаёт записи пачками (каждая пачка – отдельная транзакция)
+
+    :param objs: несохранённые объекты (можно генератор)
+    :param ignore_conflicts: пропускать записи, нарушающие уникальность
+    :return: количество переданных объектов
+    """
+    using = using or router.db_for_write(model)
+    manager = model._base_manager.db_manager(using)
+    return _run_chunked(
+        f'{model._meta.label}: создание', objs, chunk_size, using,
+        lambda chunk: manager.bulk_create(chunk, ignore_conflicts=ignore_conflicts))
+
+
+def bulk_upsert_chunked(
+        model: type[models.Model], objs: typing.Iterable[models.Model], *,
+        unique_fields: typing.Sequence[str], update_fields: typing.Sequence[str],
+        chunk_size: int = 1000, using: str = None) -> int:
+    """Создаёт новые и обновляет существующие (по unique_fields) записи пачками
+
+    На пачку – один запрос существующих ключей, один bulk_create и один bulk_update.
+    Из объектов с одинаковым ключом в пачке сохраняется последний.
+    :param update_fields: поля, обновляемые у существующих записей
+    :return: количество переданных объектов
+    """
+    using = using or router.db_for_write(model)
+    manager = model._base_manager.db_manager(using)
+    pk_name = model._meta.pk.attname
+
+    attnames = [model._meta.get_field(field).attname for field in unique_fields]
+
+    def upsert(chunk: list[models.Model]):
+        # Дубликаты ключа в пачке: остаётся последний объект
+        by_key = {tuple(getattr(obj, attname) for attname in attnames): obj for obj in chunk}
+        existing = {
+            row[1:]: row[0] for row in
+            base.db.filter_by_keys(manager.all(), attnames, by_key).values_list(pk_name, *attnames)}
+        to_create, to_update = [], []
+        for key, obj in by_key.items():
+            if key in existing:
+                setattr(obj, pk_name, existing[key])
+                to_update.append(obj)
+            else:
+                to_create.append(obj)
+        if to_create:
+            manager.bulk_create(to_create)
+        if to_update and update_fields:
+            manager.bulk_update(to_update, update_fields)
+
+    return _run_chunked(f'{model._meta.label}: upsert', objs, chunk_size, using, upsert)
+
+
+def bulk_link_m2m(
+        model: type[models.Model], field_name: str,
+        pairs: typing.Iterable[tuple[int, int]], *,
+        chunk_size: int = 1000, using: str = None) -> int:
+    """Связывает записи M2M-поля пачками через его through-таблицу
+
+    Уже существующие связи пропускаются (ignore_conflicts).
+    :param model: модель, в которой объявлено M2M-поле
+    :param pairs: пары (id записи model, id связываемой записи)
+    :return: количество переданных пар
+    """
+    field = model._meta.get_field(field_name)
+    through = field.remote_field.through
+    from_attname = through._meta.get_field(field.m2m_field_name()).attname
+    to_attname = through._meta.get_field(field.m2m_reverse_field_name()).attname
+    links = (through(**{from_attname: from_id, to_attname: to_id}) for from_id, to_id in pairs)
+    return bulk_create_chunked(through, links, chunk_size=chunk_size, ignore_conflicts=True, using=using)
+
+
+def _run_chunked(
+        title: str, objs: typing.Iterable, chunk_size: int, using: str,
+        handle_chunk: typing.Callable[[list], typing.Any]) -> int:
+    total = 0
+    with base.tools.Runtime() as timer:
+        for chunk in base.tools.chunked(objs, chunk_size):
+            with transaction.atomic(using=using):
+                handle_chunk(chunk)
+            total += len(chunk)
+            log.info('%s: %s записей (%.0f/с)', title, total, total / (timer.elapsed or 1))
+    return total
@@ -1,5 +1,13 @@
+import datetime
+import typing
+
 import pydantic
+from django.core.exceptions import FieldDoesNotExist
 from django.db import models
+from django.db import transaction
+from django.utils import timezone
+
+import base
 
 
 def admin_display(
@@ -22,6 +30,21 @@ def admin_display(
     return decorator
 
 
+def filter_by_keys(
+        queryset: models.QuerySet, fields: typing.Sequence[str],
+        keys: typing.Iterable[tuple]) -> models.QuerySet:
+    """Фильтр по набору (составных) ключей: (f1, f2) IN ((…), (…))"""
+    keys = list(keys)
+    if not keys:
+        return queryset.none()
+    if len(fields) == 1:
+        return queryset.filter(**{f'{fields[0]}__in': [key[0] for key in keys]})
+    condition = models.Q()
+    for key in keys:
+        condition |= models.Q(**dict(zip(fields, key)))
+    return queryset.filter(condition)
+
+
 class BaseDbDto(pydantic.BaseModel):
     id: int = None
 
@@ -32,6 +55,91 @@ class BaseDbDto(pydantic.BaseModel):
         underscore_attrs_are_private = True
 
 
+class UpsertResult(typing.NamedTuple):
+    """Объекты (или DTO), разделённые на вставленные и уже существовавшие"""
+    inserted: list
+    existing: list
+
+
+class CrUpQuerySet(models.QuerySet):
+    """QuerySet для CrUpModel с массовой вставкой без ошибок уникальности
+
+    Конфликты решает БД (INSERT … ON CONFLICT DO NOTHING), вместо IntegrityError
+    и отката savepoint'а на каждый дубликат (base.tools.Raise.if_db_error).
+    Вставленные записи отличаются от существовавших по created_at: у вставленной
+    он совпадает с проставленным объекту при вставке.
+    """
+
+    def insert_ignore(
+            self, objs: typing.Iterable['CrUpModel'], unique_fields: typing.Sequence[str], *,
+            batch_size: int = 500) -> UpsertResult:
+        """Вставляет записи, которых ещё нет (по unique_fields), существующие не трогает
+
+        Объектам проставляются pk, у существовавших – и created_at/modified_at из БД.
+        :param unique_fields: поля уникального ограничения, по которому возможен конфликт
+        :raises base.exc.InputDataError: запись не вставлена и не найдена (например, NOT NULL в SQLite)
+        """
+        self._for_write = True
+        result = UpsertResult([], [])
+        for chunk in base.tools.chunked(objs, batch_size):
+            inserted, existing = self._insert_ignore_chunk(chunk, unique_fields)
+            result.inserted.extend(inserted)
+            result.existing.extend(existing)
+        return result
+
+    def upsert(
+            self, objs: typing.Iterable['CrUpModel'], unique_fields: typing.Sequence[str],
+            update_fields: typing.Iterable[str], *, batch_size: int = 500) -> UpsertResult:
+        """insert_ignore() и обновление update_fields (и modified_at) у существовавших записей
+
+        На пачку: INSERT … ON CONFLICT DO NOTHING, SELECT ключей, UPDATE существовавших.
+        """
+        self._for_write = True
+        update_fields = list(update_fields)
+        if 'modified_at' not in update_fields:
+            update_fields.append('modified_at')
+        result = UpsertResult([], [])
+        for chunk in base.tools.chunked(objs, batch_size):
+            with transaction.atomic(using=self.db):
+                inserted, existing = self._insert_ignore_chunk(chunk, unique_fields)
+                if existing:
+                    now = timezone.now()
+                    for obj in existing:
+                        obj.modified_at = now
+                    self.bulk_update(existing, update_fields)
+            result.inserted.extend(inserted)
+            result.existing.extend(existing)
+        return result
+
+    def _insert_ignore_chunk(
+            self, chunk: list['CrUpModel'], unique_fields: typing.Sequence[str]) -> UpsertResult:
+        attnames = [self.model._meta.get_field(field).attname for field in unique_fields]
+        self.bulk_create(chunk, ignore_conflicts=True)
+        rows = {
+            tuple(row[3:]): row[:3] for row in
+            filter_by_keys(
+                self.model._base_manager.using(self.db).all(), attnames,
+                {tuple(getattr(obj, attname) for attname in attnames) for obj in chunk},
+            ).values_list('pk', 'created_at', 'modified_at', *attnames)}
+        result = UpsertResult([], [])
+        seen = set()
+        for obj in chunk:
+            key = tuple(getattr(obj, attname) for attname in attnames)
+            try:
+                pk, created_at, modified_at = rows[key]
+            except KeyError:
+                raise base.exc.InputDataError(
+                    f'{self.model.__name__} {dict(zip(attnames, key))} не вставлен', obj) from None
+            obj.pk = pk
+            if key not in seen and created_at == obj.created_at:
+                result.inserted.append(obj)
+            else:
+                obj.created_at, obj.modified_at = created_at, modified_at
+                result.existing.append(obj)
+            seen.add(key)
+        return result
+
+
 class CrUpModel(models.Model):
     """Базовый класс модели с полями created_at и modified_at"""
 
@@ -44,5 +152,192 @@ class CrUpModel(models.Model):
         help_text='Дата последнего изменения записи в БД',
         auto_now=True)
 
+    objects = CrUpQuerySet.as_manager()
+
     class Meta:
         abstract = True
+
+
+class BaseRepository:
+    """Базовый репозиторий: БД-модель ↔ DTO
+
+    Чтение идёт из values_list() сразу в DTO, минуя создание экземпляров
+    БД-модели. Строки из БД считаются уже валидными, поэтому по умолчанию
+    DTO собираются без валидации (construct), validate=True её включает.
+    Запись (bulk_create/bulk_update) выполняется пачками по chunk_size.
+    """
+
+    model: type[models.Model]
+    dto: type[BaseDbDto]
+    chunk_size: int = 500
+
+    def __init__(self, *, validate: bool = False):
+        self.validate = validate
+
+    @classmethod
+    def get_fields(cls) -> tuple[str, ...]:
+        """Поля DTO, которые есть в БД-модели (для values_list())"""
+        if '_fields' not in cls.__dict__:
+            model_fields = set()
+            for field in cls.model._meta.concrete_fields:
+                model_fields.update((field.name, field.attname))
+            cls._fields = tuple(name for name in cls.dto.__fields__ if name in model_fields)
+        return cls._fields
+
+    def get_queryset(self) -> models.QuerySet:
+        return self.model._default_manager.all()
+
+    def _get_dto_model_fields(self, names: typing.Iterable[str]) -> list[models.Field]:
+        """Поля БД-модели по именам (user или user_id), значения которых есть в DTO
+
+        :raises base.exc.ArgumentError: поля нет в модели или его значения нет в DTO
+        """
+        model_fields = []
+        for name in names:
+            try:
+                model_fields.append(self.model._meta.get_field(name))
+            except FieldDoesNotExist:
+                raise base.exc.ArgumentError(f'Поля {name} нет в {self.model.__name__}', name) from None
+        missing = [field.name for field in model_fields if field.attname not in self.get_fields()]
+        if missing:
+            # Иначе в БД молча записалось бы значение поля модели по умолчанию
+            raise base.exc.ArgumentError(f'Значений полей {missing} нет в DTO {self.dto.__name__}', missing)
+        return model_fields
+
+    def to_dto(self, values: dict) -> BaseDbDto:
+        if self.validate:
+            return self.dto.parse_obj(values)
+        return self.dto.construct(**values)
+
+    def iter_dto(self, queryset: models.QuerySet = None) -> typing.Iterator[BaseDbDto]:
+        """Генератор DTO по queryset'у (по умолчанию – по всем записям)
+
+        Записи читаются из БД итератором пачками по chunk_size.
+        """
+        if queryset is None:
+            queryset = self.get_queryset()
+        fields = self.get_fields()
+        rows = queryset.values_list(*fields).iterator(chunk_size=self.chunk_size)
+        for row in rows:
+            yield self.to_dto(dict(zip(fields, row)))
+
+    def list_dto(self, queryset: models.QuerySet = None) -> list[BaseDbDto]:
+        return list(self.iter_dto(queryset))
+
+    def get_by_ids(self, ids: typing.Iterable[int]) -> dict[int, BaseDbDto]:
+        """Возвращает {id: DTO} для найденных id
+
+        Отсутствующих в БД id в результате нет.
+        """
+        result = {}
+        queryset = self.get_queryset()
+        for chunk in base.tools.chunked(set(ids), self.chunk_size):
+            for dto in self.iter_dto(queryset.filter(pk__in=chunk)):
+                result[dto.id] = dto
+        return result
+
+    def get(self, pk: int) -> BaseDbDto:
+        """Возвращает DTO записи
+
+        :raises base.exc.NotFound:
+        """
+        try:
+            return self.get_by_ids([pk])[pk]
+        except KeyError:
+            raise base.exc.NotFound(f'{self.model.__name__} id={pk} не найден', pk) from None
+
+    def get_freshness(self, ids: typing.Iterable[int]) -> tuple[datetime.datetime | None, int]:
+        """(max(modified_at), количество) найденных записей – один агрегирующий запрос
+
+        Только для наследников CrUpModel. Для условных запросов API (ETag/Last-Modified).
+        """
+        result = self.get_queryset().filter(pk__in=set(ids)).aggregate(
+            last_modified=models.Max('modified_at'), count=models.Count('pk'))
+        return result['last_modified'], result['count']
+
+    def bulk_create(self, dtos: typing.Iterable[BaseDbDto]) -> list[BaseDbDto]:
+        """Создаёт записи пачками по chunk_size
+
+        Если БД возвращает id созданных записей – они проставляются в DTO.
+        """
+        result = []
+        fields = set(self.get_fields()) - {'id'}
+        manager = self.model._default_manager
+        for chunk in base.tools.chunked(dtos, self.chunk_size):
+            objs = manager.bulk_create([self.model(**dto.dict(include=fields)) for dto in chunk])
+            for dto, obj in zip(chunk, objs):
+                if obj.pk is not None:
+                    dto.id = obj.pk
+            result.extend(chunk)
+        return result
+
+    def insert_ignore(
+            self, dtos: typing.Iterable[BaseDbDto], unique_fields: typing.Sequence[str]) -> UpsertResult:
+        """Создаёт отсутствующие (по unique_fields) записи, см. CrUpQuerySet.insert_ignore()
+
+        Только для наследников CrUpModel. В DTO проставляются id.
+        """
+        return self._upsert(dtos, unique_fields, None)
+
+    def upsert(
+            self, dtos: typing.Iterable[BaseDbDto], unique_fields: typing.Sequence[str],
+            update_fields: typing.Iterable[str]) -> UpsertResult:
+        """Создаёт отсутствующие и обновляет существующие записи, см. CrUpQuerySet.upsert()
+
+        Только для наследников CrUpModel. В DTO проставляются id.
+        :param unique_fields: поля уникального ограничения (user или user_id)
+        :param update_fields: обновляемые поля БД-модели, значения которых есть в DTO
+        :raises base.exc.ArgumentError: поля нет в модели или его значения нет в DTO
+        """
+        return self._upsert(dtos, unique_fields, list(update_fields))
+
+    def _upsert(
+            self, dtos: typing.Iterable[BaseDbDto], unique_fields: typing.Sequence[str],
+            update_fields: list[str] | None) -> UpsertResult:
+        # Поля уникальности (в т.ч. id) нужны в объектах – по ним ищутся конфликты
+        unique_attnames = {field.attname for field in self._get_dto_model_fields(unique_fields)}
+        if update_fields is not None:
+            update_fields = [field.name for field in self._get_dto_model_fields(update_fields)]
+        fields = set(self.get_fields()) - {'id'} | unique_attnames
+        result = UpsertResult([], [])
+        queryset = self.model._default_manager.all()
+        for chunk in base.tools.chunked(dtos, self.chunk_size):
+            objs = [self.model(**dto.dict(include=fields)) for dto in chunk]
+            if update_fields is None:
+                objs_result = queryset.insert_ignore(objs, unique_fields, batch_size=self.chunk_size)
+            else:
+                objs_result = queryset.upsert(objs, unique_fields, update_fields, batch_size=self.chunk_size)
+            dto_by_obj = {id(obj): dto for obj, dto in zip(objs, chunk)}
+            for objs_list, dto_list in zip(objs_result, result):
+                for obj in objs_list:
+                    dto = dto_by_obj[id(obj)]
+                    dto.id = obj.pk
+                    dto_list.append(dto)
+        return result
+
+    def bulk_update(self, dtos: typing.Iterable[BaseDbDto], fields: typing.Iterable[str]) -> int:
+        """Обновляет поля fields записей пачками по chunk_size
+
+        У наследников CrUpModel обновляется и modified_at
+        (bulk_update сам auto_now не проставляет).
+        :param fields: поля БД-модели (user или user_id), значения которых есть в DTO
+        :return: количество обновлённых записей
+        :raises base.exc.ArgumentError: поля нет в модели или его значения нет в DTO
+        """
+        model_fields = self._get_dto_model_fields(fields)
+        include = {field.attname for field in model_fields} | {'id'}
+        fields = [field.name for field in model_fields]
+        is_crup = issubclass(self.model, CrUpModel)
+        if is_crup and 'modified_at' not in fields:
+            fields.append('modified_at')
+        updated = 0
+        manager = self.model._default_manager
+        for chunk in base.tools.chunked(dtos, self.chunk_size):
+            objs = [self.model(**dto.dict(include=include)) for dto in chunk]
+            if is_crup:
+                now = timezone.now()
+                for obj in objs:
+                    obj.modified_at = now
+            rows = manager.bulk_update(objs, fields)
+            updated += len(objs) if rows is None else rows  # django<4 возвращает None
+        return updated
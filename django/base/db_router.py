@@ -0,0 +1,130 @@
+"""Маршрутизация запросов к БД: запись – в primary (default), чтение – в реплики
+
+settings:
+    DATABASE_ROUTERS = ['base.db_router.ReplicaRouter']
+    DATABASE_REPLICAS = ['replica_1', ...]  # алиасы из DATABASES
+    REPLICA_LAG_SEC = 5  # сколько после записи читать из primary
+    MIDDLEWARE += ['base.db_router.ReplicaPinMiddleware']
+
+Чтение остаётся в primary:
+- внутри транзакции (transaction.atomic) на primary;
+- в течение REPLICA_LAG_SEC после записи в том же контексте (запрос, задача),
+  а через cookie (ReplicaPinMiddleware) – и в следующих запросах того же клиента
+  ("read your writes");
+- внутри with base.db_router.use_primary();
+- для приложений из REPLICA_EXCLUDED_APPS (сессии);
+- в management-командах (manage.py: migrate, воркеры и т.п.).
+
+Все чтения одного запроса идут в одну реплику: она выбирается при первом
+чтении, ReplicaPinMiddleware сбрасывает выбор в начале запроса. Иначе,
+например, ETag и тело ответа читались бы из реплик с разным отставанием.
+"""
+import contextlib
+import contextvars
+import random
+import time
+
+from django import http
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db import transaction
+from django.utils.deprecation import MiddlewareMixin
+
+# Время (time.monotonic()) последней записи в текущем контексте
+_written_at: contextvars.ContextVar[float | None] = contextvars.ContextVar('db_written_at', default=None)
+_use_primary: contextvars.ContextVar[bool] = contextvars.ContextVar('db_use_primary', default=False)
+# Реплика, выбранная для текущего контекста
+_replica: contextvars.ContextVar[str | None] = contextvars.ContextVar('db_replica', default=None)
+
+
+def get_replicas() -> list[str]:
+    return list(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+
+def get_lag() -> float:
+    return getattr(settings, 'REPLICA_LAG_SEC', 5)
+
+
+def pin():
+    """Читать из primary ближайшие REPLICA_LAG_SEC секунд"""
+    _written_at.set(time.monotonic())
+
+
+def is_pinned() -> bool:
+    written_at = _written_at.get()
+    return written_at is not None and time.monotonic() - written_at < get_lag()
+
+
+def get_replica(replicas: list[str]) -> str:
+    """Реплика текущего контекста (выбирается случайно при первом обращении)"""
+    replica = _replica.get()
+    if replica not in replicas:
+        replica = random.choice(replicas)
+        _replica.set(replica)
+    return replica
+
+
+@contextlib.contextmanager
+def use_primary():
+    """Все запросы внутри блока – в primary"""
+    token = _use_primary.set(True)
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+class ReplicaRouter:
+
+    def __init__(self):
+        self.replicas = get_replicas()
+        self.excluded_apps = frozenset(getattr(settings, 'REPLICA_EXCLUDED_APPS', ('sessions',)))
+
+    def db_for_read(self, model, **hints) -> str:
+        if (
+                not self.replicas
+                or model._meta.app_label in self.excluded_apps
+                or _use_primary.get()
+                or transaction.get_connection(DEFAULT_DB_ALIAS).in_atomic_block
+                or is_pinned()):
+            return DEFAULT_DB_ALIAS
+        return get_replica(self.replicas)
+
+    def db_for_write(self, model, **hints) -> str:
+        if model._meta.app_label not in self.excluded_apps:
+            pin()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool | None:
+        databases = {DEFAULT_DB_ALIAS, *self.replicas}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db: str, app_label: str, **hints) -> bool | None:
+        # Реплики – копии primary, схема приходит с репликацией
+        if db in self.replicas:
+            return False
+        return None
+
+
+class ReplicaPinMiddleware(MiddlewareMixin):
+    """Переносит "чтение из primary после записи" между запросами клиента через cookie
+
+    и выбирает для каждого запроса заново одну реплику на все его чтения.
+    """
+
+    cookie_name = 'db_pin'
+
+    def process_request(self, request: http.HttpRequest):
+        request._db_pin_started = time.monotonic()
+        _written_at.set(request._db_pin_started if request.COOKIES.get(self.cookie_name) else None)
+        _replica.set(None)
+
+    def process_response(self, request: http.HttpRequest, response: http.HttpResponse):
+        written_at = _written_at.get()
+        started = getattr(request, '_db_pin_started', None)
+        if written_at is not None and started is not None and written_at > started:
+            response.set_cookie(
+                self.cookie_name, '1', max_age=max(int(get_lag()), 1), httponly=True, samesite='Lax')
+        return response
@@ -20,11 +20,17 @@ class ViewResponse(BaseException):
 
     Исключение ловится декоратором или в middleware.
     """
-    def __init__(self, message: str, response_dto):
+    def __init__(
+            self, message: str, response_dto,
+            status: int = None, headers: dict[str, str] = None):
         """
         :type response_dto: base.struct.BaseViewResponse
+        :param status: HTTP-статус ответа (по умолчанию 200, статус – в DTO)
+        :param headers: HTTP-заголовки ответа (например Allow для 405)
         """
         self.response_dto = response_dto
+        self.status = status
+        self.headers = headers or {}
         super().__init__(message)
 
 
@@ -99,3 +105,10 @@ class UnsupportedData(DataError):
 
 class InternalError(BaseException):
     """Не зависящая от пользователя внутренняя ошибка сервиса"""
+
+
+class CircuitOpen(InternalError):
+    """Внешний сервис недоступен – вызовы временно не выполняются
+
+    См. base.tools.CircuitBreaker"""
+    default_message = 'Сервис временно недоступен'
@@ -0,0 +1,82 @@
+"""Ленивый импорт подмодулей пакета (PEP 562)
+
+В __init__.py пакета:
+>>> from base import lazy
+>>>
+>>> __all__ = [
+>>>     'controller',
+>>>     'request',
+>>> ]
+>>>
+>>> __getattr__ = lazy.attach(__name__, __all__)
+
+(не import base: в apps.api имя base – ленивый подпакет apps.api.base)
+
+Подмодуль импортируется при первом обращении (api.order.v1.get.controller)
+и записывается в пространство имён пакета, дальше это обычный атрибут
+модуля, __getattr__ больше не вызывается.
+
+Eager-режим (переменная окружения LAZY_IMPORT_EAGER=1 или
+settings.LAZY_IMPORT_EAGER = True): при старте воркера import_all()
+импортирует подмодули всех пакетов заранее (см. conf/wsgi.py, conf/asgi.py).
+Модули приложений можно импортировать только после django.setup().
+"""
+import importlib
+import os
+import sys
+import typing
+
+# Пакеты с ленивыми подмодулями: {пакет: подмодули}
+_packages: dict[str, tuple[str, ...]] = {}
+
+
+def attach(package_name: str, submodules: typing.Iterable[str]) -> typing.Callable[[str], typing.Any]:
+    """Регистрирует пакет и возвращает его __getattr__"""
+    submodules = tuple(submodules)
+    _packages[package_name] = submodules
+    names = frozenset(submodules)
+
+    def __getattr__(name: str):
+        if name in names:
+            module = importlib.import_module(f'.{name}', package_name)
+            setattr(sys.modules[package_name], name, module)
+            return module
+        raise AttributeError(f'module {package_name!r} has no attribute {name!r}')
+
+    return __getattr__
+
+
+def packages() -> dict[str, tuple[str, ...]]:
+    """Зарегистрированные (уже импортированные) пакеты и их ленивые подмодули"""
+    return dict(_packages)
+
+
+def import_all(*package_names: str) -> int:
+    """Импортирует ленивые подмодули пакетов рекурсивно
+
+    :param package_names: по умолчанию – все зарегистрированные пакеты
+    :return: количество импортированных подмодулей
+    """
+    queue = list(package_names or _packages)
+    seen = set()
+    count = 0
+    while queue:
+        package_name = queue.pop(0)
+        if package_name in seen:
+            continue
+        seen.add(package_name)
+        package = importlib.import_module(package_name)
+        for name in _packages.get(package_name, ()):
+            getattr(package, name)
+            count += 1
+            queue.append(f'{package_name}.{name}')
+    return count
+
+
+def is_eager() -> bool:
+    """Включён ли eager-режим (окружение приоритетнее settings)"""
+    value = os.environ.get('LAZY_IMPORT_EAGER')
+    if value is not None:
+        return value.lower() in ('1', 'true', 'yes', 'on')
+    from django.conf import settings
+    return settings.configured and bool(getattr(settings, 'LAZY_IMPORT_EAGER', False))
@@ -0,0 +1,169 @@
+"""Неблокирующее логирование: очередь, фоновый поток, ограничение частоты
+
+Поток запроса только кладёт запись в очередь (QueueHandler), форматирование
+и запись в stderr/файлы выполняют обычные handler'ы в фоновом потоке
+(logging.handlers.QueueListener). Частые debug-сообщения отсекаются
+фильтрами RateLimitFilter/SamplingFilter, навешенными на нужные логгеры.
+
+LOGGING = {
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'console'},
+        'queue': {'()': 'base.log.QueueHandler', 'handlers': ['cfg://handlers.console']},
+    },
+    'filters': {
+        'rate_limit': {'()': 'base.log.RateLimitFilter', 'rate': 10},
+    },
+    'loggers': {
+        '': {'handlers': ['queue']},
+        'base.tools': {'filters': ['rate_limit']},
+    },
+}
+"""
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+import time
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """Кладёт записи в ограниченную очередь, остальное делает фоновый поток
+
+    Целевые handler'ы указываются ссылками cfg://handlers.<имя> на handler'ы
+    из LOGGING (или самими объектами handler'ов). Ссылки разрешаются при
+    первой записи, когда dictConfig уже создал все handler'ы, поэтому
+    порядок имён в LOGGING не важен. Тогда же запускается поток слушателя;
+    в дочернем после fork процессе (воркеры после conf/boot.py) очередь
+    пересоздаётся и поток запускается заново.
+    При переполнении очереди запись отбрасывается (счётчик dropped),
+    поток запроса не ждёт.
+    """
+
+    def __init__(self, handlers: list[str | logging.Handler], maxsize: int = 10_000):
+        super().__init__(queue.Queue(maxsize))
+        # Из dictConfig приходит ConvertingList: элементы cfg:// преобразуются
+        # при обращении, а не сейчас (целевые handler'ы могут быть ещё не созданы)
+        self._targets = handlers
+        self.listener: logging.handlers.QueueListener | None = None
+        self.dropped = 0
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        # Поток слушателя в дочерний процесс не переходит
+        self.queue = queue.Queue(self.queue.maxsize)
+        self.listener = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self.listener is not None:
+                return
+            self.listener = logging.handlers.QueueListener(
+                self.queue, *self._resolve_targets(), respect_handler_level=True)
+            self.listener.start()
+
+    def _resolve_targets(self) -> list[logging.Handler]:
+        targets = [self._targets[i] for i in range(len(self._targets))]
+        invalid = [target for target in targets if not isinstance(target, logging.Handler)]
+        if invalid:
+            raise ValueError(f'Ожидались handler\'ы или ссылки cfg://handlers.<имя>, получено: {invalid}')
+        return targets
+
+    def stop(self):
+        """Дописывает очередь и останавливает поток (вызывается и из logging.shutdown())"""
+        with self._lock:
+            if self.listener is not None:
+                self.listener.stop()
+                self.listener = None
+
+    def close(self):
+        self.stop()
+        super().close()
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.listener is None:
+            self.start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Только подставляет args в сообщение (их объекты могут измениться позже)
+
+        Форматирование (время, traceback) остаётся handler'ам фонового потока.
+        """
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class RateLimitFilter(logging.Filter):
+    """Не более rate записей в секунду от логгера для уровней до max_level включительно
+
+    Более важные записи проходят всегда. Отброшенные считаются в suppressed.
+    """
+
+    def __init__(self, rate: float = 10, max_level: str | int = logging.DEBUG, name: str = ''):
+        super().__init__(name)
+        self.rate = rate
+        self.max_level = logging._checkLevel(max_level)
+        self.suppressed: dict[str, int] = {}
+        self._buckets: dict[str, tuple[float, float]] = {}  # логгер: (токены, время)
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(record.name, (self.rate, now))
+            tokens = min(self.rate, tokens + (now - updated_at) * self.rate)
+            if tokens < 1:
+                self._buckets[record.name] = (tokens, now)
+                self.suppressed[record.name] = self.suppressed.get(record.name, 0) + 1
+                return False
+            self._buckets[record.name] = (tokens - 1, now)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает долю ratio записей уровней до max_level включительно"""
+
+    def __init__(self, ratio: float = 0.1, max_level: str | int = logging.DEBUG, name: str = ''):
+        super().__init__(name)
+        self.ratio = ratio
+        self.max_level = logging._checkLevel(max_level)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > self.max_level or random.random() < self.ratio
+
+
+class JsonFormatter(logging.Formatter):
+    """Запись лога – одна JSON-строка (для сборщиков логов)
+
+    Поля, переданные через extra={...}, попадают в JSON как есть.
+    """
+
+    _record_attrs = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'func': record.funcName,
+            'file': f'{record.filename}:{record.lineno}',
+        }
+        data.update((key, value) for key, value in vars(record).items() if key not in self._record_attrs)
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            data['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
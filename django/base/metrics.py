@@ -0,0 +1,128 @@
+"""Метрики времени выполнения (гистограммы поверх base.tools.Runtime)
+
+>>> @base.metrics.registry.timed('export_seconds', kind='orders')
+>>> def export():
+>>>     ...
+>>> base.metrics.registry.exposition()  # текст в формате Prometheus
+"""
+import bisect
+import threading
+import typing
+
+import base
+
+
+def _default_bounds() -> tuple[float, ...]:
+    """Границы корзин: от 0.1 мс до ~2 мин с шагом ×1.25 (погрешность перцентилей ≤25%)"""
+    bounds = []
+    bound = 0.0001
+    while bound < 120:
+        bounds.append(round(bound, 6))
+        bound *= 1.25
+    return tuple(bounds)
+
+
+DEFAULT_BOUNDS = _default_bounds()
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами
+
+    observe() – бинарный поиск корзины и пара сложений, без хранения значений.
+    Перцентили оцениваются по верхней границе корзины.
+    """
+
+    def __init__(self, bounds: tuple[float, ...] = DEFAULT_BOUNDS):
+        self.bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float | base.tools.Runtime):
+        """Добавляет значение (подходит как on_finish для Runtime.decorator)"""
+        value = float(value)
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self._counts[i] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, q: float) -> float:
+        """Оценка перцентиля, q – от 0 до 1"""
+        with self._lock:
+            counts = list(self._counts)
+            count, max_value = self.count, self.max
+        if not count:
+            return 0.0
+        rank = q * count
+        cumulative = 0
+        for i, bucket_count in enumerate(counts):
+            cumulative += bucket_count
+            if cumulative >= rank and bucket_count:
+                return min(self.bounds[i], max_value) if i < len(self.bounds) else max_value
+        return max_value
+
+    def summary(self) -> dict[str, float]:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'max': self.max,
+            'p50': self.percentile(0.5),
+            'p95': self.percentile(0.95),
+            'p99': self.percentile(0.99),
+        }
+
+
+class MetricsRegistry:
+    """Реестр гистограмм по имени метрики и меткам"""
+
+    quantiles = (0.5, 0.95, 0.99)
+
+    def __init__(self):
+        self._histograms: dict[tuple[str, tuple[tuple[str, str], ...]], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        key = (name, tuple(sorted((label, str(value)) for label, value in labels.items())))
+        try:
+            return self._histograms[key]
+        except KeyError:
+            with self._lock:
+                return self._histograms.setdefault(key, Histogram())
+
+    def timed(self, name: str, **labels) -> typing.Callable:
+        """Декоратор: время выполнения функции в гистограмму name{labels}"""
+        return base.tools.Runtime.decorator(on_finish=self.histogram(name, **labels).observe)
+
+    def exposition(self) -> str:
+        """Все метрики в текстовом формате Prometheus (summary)"""
+        lines = []
+        last_name = None
+        for (name, labels), histogram in sorted(self._histograms.items()):
+            if name != last_name:
+                lines.append(f'# TYPE {name} summary')
+                last_name = name
+            summary = histogram.summary()
+            for q in self.quantiles:
+                lines.append(f'{name}{self._format_labels(labels, quantile=q)} {histogram.percentile(q):.6f}')
+            lines.append(f'{name}_count{self._format_labels(labels)} {summary["count"]}')
+            lines.append(f'{name}_sum{self._format_labels(labels)} {summary["sum"]:.6f}')
+            lines.append(f'{name}_max{self._format_labels(labels)} {summary["max"]:.6f}')
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _format_labels(labels: tuple[tuple[str, str], ...], **extra) -> str:
+        pairs = list(labels) + [(label, str(value)) for label, value in extra.items()]
+        if not pairs:
+            return ''
+        escaped = (
+            (label, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+            for label, value in pairs)
+        return '{%s}' % ','.join(f'{label}="{value}"' for label, value in escaped)
+
+
+registry = MetricsRegistry()
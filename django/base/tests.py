@@ -0,0 +1,21 @@
+from django.test import SimpleTestCase
+
+import base
+
+
+class UrlTemplateTest(SimpleTestCase):
+
+    def test_format(self):
+        template = base.tools.UrlTemplate('https://example.com/api/v{version}/order/{order_id}/')
+        self.assertEqual(
+            template.format(version=2, order_id='a b/c', query={'expand': ['items', 'user']}),
+            'https://example.com/api/v2/order/a%20b%2Fc/?expand=items&expand=user')
+
+    def test_escaped_braces(self):
+        self.assertEqual(base.tools.UrlTemplate('a{{b}}c/{x}/').format(x=1), 'a{b}c/1/')
+        self.assertEqual(base.tools.UrlTemplate('/{x}/?q={{x}}').format(x=1), '/1/?q={x}')
+        self.assertEqual(base.tools.UrlTemplate('{{}}').format(), '{}')
+
+    def test_join(self):
+        template = base.tools.UrlTemplate.of('https://example.com/api/') / '/v{version:02d}/{{x}}'
+        self.assertEqual(template.format(version=3), 'https://example.com/api/v03/{x}')
@@ -1,23 +1,47 @@
+import asyncio
+import collections
 import collections.abc
-import copy
 import datetime
 import functools
+import itertools
+import json
 import logging
+import operator
+import random
+import string
+import threading
 import time
 import typing
+import urllib.parse
 
+import django.conf
+import django.core.serializers.json
 import django.db
 import django.http
+import django.utils.module_loading
 import psycopg2
 import pydantic
 
 import base
 
+try:
+    import orjson
+except ImportError:  # orjson – опциональная зависимость
+    orjson = None
+
 log = logging.getLogger(__name__)
 
+_django_json_encoder = django.core.serializers.json.DjangoJSONEncoder()
+_ORJSON_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
 
 class UrlPath(str):
-    """Для манипуляций с путем URL'a"""
+    """Для манипуляций с путем URL'a
+
+    Каждая операция создаёт не больше одной новой строки, если путь
+    не меняется – возвращается он сам. Для URL, собираемых в цикле
+    по шаблону, – UrlTemplate.
+    """
 
     def __add__(self, other) -> 'UrlPath':
         return self.__class__(super().__add__(other))
@@ -35,27 +59,109 @@ class UrlPath(str):
     @property
     def strip_rslash(self) -> 'UrlPath':
         """Удаляет слэш справа"""
+        if not self.endswith('/'):
+            return self
         return self.__class__(self.rstrip('/'))
 
     @property
     def strip_lslash(self) -> 'UrlPath':
         """Удаляет слэш слева"""
+        if not self.startswith('/'):
+            return self
         return self.__class__(self.lstrip('/'))
 
     @property
     def with_rslash(self) -> 'UrlPath':
         """Добавляет слэш справа"""
-        return self.__class__(self.strip_rslash + '/')
+        if self.endswith('/') and not self.endswith('//'):
+            return self
+        return self.__class__(self.rstrip('/') + '/')
 
     @property
     def with_lslash(self) -> 'UrlPath':
         """Добавляет слэш слева"""
-        return self.__class__('/' + self.strip_lslash)
+        if self.startswith('/') and not self.startswith('//'):
+            return self
+        return self.__class__('/' + self.lstrip('/'))
 
     @property
     def only_rslash(self) -> 'UrlPath':
         """Удаляет слэш слева и добавляет справа"""
-        return self.strip_lslash.with_rslash
+        if not self.startswith('/') and self.endswith('/') and not self.endswith('//'):
+            return self
+        return self.__class__(self.strip('/') + '/')
+
+
+class UrlTemplate:
+    """Шаблон URL, разобранный один раз
+
+    >>> ORDER_URL = UrlTemplate('https://example.com/api/v{version}/order/{order_id}/')
+    >>> ORDER_URL.format(version=2, order_id=15, query={'expand': ['items', 'user']})
+    UrlPath('https://example.com/api/v2/order/15/?expand=items&expand=user')
+
+    format() собирает URL одной склейкой частей шаблона и значений:
+    значения экранируются как сегмент пути (quote(safe='')), query – urlencode.
+    Шаблоны склеиваются как UrlPath (/), результат склейки запоминается:
+    >>> ORDER_URL = UrlTemplate.of('https://example.com/api/') / 'v{version}/order/{order_id}/'
+    """
+
+    __slots__ = ('pattern', '_head', '_fields')
+
+    def __init__(self, pattern: str):
+        self.pattern = str(pattern)
+        # Литерал разбивается parse() на куски по экранированным {{ }} – склеиваем
+        # все куски до следующего поля: [голова, (поле, формат, литерал после поля), …]
+        literals = ['']
+        fields = []
+        for literal, field_name, format_spec, conversion in string.Formatter().parse(self.pattern):
+            literals[-1] += literal
+            if field_name is None:
+                continue
+            if not field_name or conversion:
+                raise base.exc.ArgumentError(f'Неподдерживаемое поле шаблона URL: {pattern!r}', pattern)
+            fields.append((field_name, format_spec or ''))
+            literals.append('')
+        self._head = literals[0]
+        # (имя поля, формат, литерал после поля)
+        fields = [(field_name, format_spec, literal) for (field_name, format_spec), literal in zip(fields, literals[1:])]
+        self._fields = tuple(fields)
+
+    @classmethod
+    @functools.lru_cache(maxsize=256)
+    def of(cls, pattern: str) -> 'UrlTemplate':
+        """Разобранный шаблон (для одинаковых pattern – один и тот же объект)"""
+        return cls(pattern)
+
+    def __repr__(self) -> str:
+        return '%s(%r)' % (self.__class__.__name__, self.pattern)
+
+    def __truediv__(self, other: typing.Union[str, 'UrlTemplate']) -> 'UrlTemplate':  # /
+        return _join_url_templates(self.pattern, str(getattr(other, 'pattern', other)))
+
+    @property
+    def field_names(self) -> tuple[str, ...]:
+        return tuple(field_name for field_name, _, _ in self._fields)
+
+    def format(self, query: typing.Mapping | typing.Iterable[tuple] = None, **values) -> UrlPath:
+        """URL со значениями полей (и query string, если задан)
+
+        :raises KeyError: не передано значение поля
+        """
+        parts = [self._head]
+        for field_name, format_spec, literal in self._fields:
+            value = values[field_name]
+            value = format(value, format_spec) if format_spec else str(value)
+            parts.append(urllib.parse.quote(value, safe=''))
+            parts.append(literal)
+        if query:
+            parts.append('?')
+            parts.append(urllib.parse.urlencode(query, doseq=True))
+        return UrlPath(''.join(parts))
+
+
+@functools.lru_cache(maxsize=256)
+def _join_url_templates(left: str, right: str) -> UrlTemplate:
+    return UrlTemplate(UrlPath(left) / right)
 
 
 class Raise:
@@ -72,6 +178,9 @@ class Raise:
     def if_db_error(cls, exc: Exception, data: typing.Any | None = None):
         """Рерайзит известные БД-исключения
 
+        Массовую вставку с возможными дубликатами лучше делать без исключений:
+        base.db.CrUpQuerySet.insert_ignore()/upsert().
+
         :raises base.exc.AlreadyExistError:
         :raises base.exc.InputDataError:
         """
@@ -119,33 +228,184 @@ def iter_exc(e: Exception) -> collections.abc.Iterable[str]:
         yield from iter_exc(e.__context__)
 
 
+def chunked(iterable: collections.abc.Iterable, size: int) -> collections.abc.Iterator[list]:
+    """Генератор, разбивающий итерируемое на списки длиной не более size"""
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
 def json_response(func):
+    """Декоратор view: преобразует base.web.BaseViewResponse в JSON-ответ
+
+    Работает как с обычными, так и с async-функциями.
+    """
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapped(*args, **kwargs):
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                result = _exception_to_response(func, e)
+            return _render_response(result)
+
+        return async_wrapped
+
     @functools.wraps(func)
     def wrapped(*args, **kwargs):
         try:
             result = func(*args, **kwargs)
-        except base.exc.ViewResponse as e:
-            result = e.response_dto
         except Exception as e:
-            log.exception('Неперхваченная ошибка во view %s()', func.__name__)
-            result = base.web.BaseViewError().add(
-                'Произошла неперехваченная ошибка', *iter_exc(e))
-        if isinstance(result, base.web.BaseViewResponse):
-            by_alias = getattr(result.Config, 'by_alias', True)
-            return django.http.JsonResponse(result.dict(by_alias=by_alias))
-        return result
+            result = _exception_to_response(func, e)
+        return _render_response(result)
 
     return wrapped
 
 
+def _exception_to_response(func, e: Exception):
+    if isinstance(e, base.exc.ViewResponse):
+        if e.status is None and not e.headers:
+            return e.response_dto
+        response = _render_response(e.response_dto)
+        if e.status is not None:
+            response.status_code = e.status
+        for header, value in e.headers.items():
+            response[header] = value
+        return response
+    log.exception('Неперхваченная ошибка во view %s()', func.__name__)
+    return base.web.BaseViewError().add('Произошла неперехваченная ошибка', *iter_exc(e))
+
+
+def _render_response(result):
+    if isinstance(result, base.web.BaseViewResponse):
+        return render_json_response(result)
+    return result
+
+
+def render_json_response(result: base.web.BaseViewResponse) -> django.http.HttpResponse:
+    """HTTP-ответ с DTO, сериализованным в JSON"""
+    return django.http.HttpResponse(render_json(result), content_type='application/json')
+
+
+def render_json(result: base.web.BaseViewResponse) -> bytes:
+    """Сериализует DTO ответа в JSON (bytes)"""
+    by_alias = getattr(result.Config, 'by_alias', True)
+    return json_dumps(result.dict(by_alias=by_alias))
+
+
+def json_dumps(data: typing.Any) -> bytes:
+    """Сериализует данные в JSON (bytes)
+
+    Сериализатор задаётся в settings.JSON_DUMPS (путь до функции
+    data → bytes), по умолчанию используется orjson, если он установлен,
+    иначе – json из stdlib (как в django.http.JsonResponse).
+    Алиасы, enum'ы и даты в обоих случаях сериализуются одинаково.
+    """
+    return _get_json_dumps()(data)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_json_dumps() -> typing.Callable[[typing.Any], bytes]:
+    dotted_path = getattr(django.conf.settings, 'JSON_DUMPS', None)
+    if dotted_path:
+        return django.utils.module_loading.import_string(dotted_path)
+    if orjson is not None:
+        return orjson_dumps
+    return stdlib_json_dumps
+
+
+def orjson_dumps(data: typing.Any) -> bytes:
+    """Сериализация через orjson
+
+    Даты отдаются DjangoJSONEncoder'у, чтобы формат не отличался от stdlib-варианта.
+    """
+    return orjson.dumps(data, default=_django_json_encoder.default, option=_ORJSON_OPTIONS)
+
+
+def stdlib_json_dumps(data: typing.Any) -> bytes:
+    """Сериализация через json из stdlib"""
+    return json.dumps(data, cls=django.core.serializers.json.DjangoJSONEncoder).encode()
+
+
+class RetryBudget:
+    """Общий бюджет повторов: не более max_retries повторов за period_sec
+
+    Во время отказа внешнего сервиса не даёт повторам всех вызовов
+    умножать нагрузку на него.
+    """
+
+    def __init__(self, max_retries: int, period_sec: float = 60):
+        self.max_retries = max_retries
+        self.period_sec = period_sec
+        self._timestamps = collections.deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """Забирает один повтор из бюджета (False – бюджет исчерпан)"""
+        now = time.monotonic()
+        with self._lock:
+            while self._timestamps and now - self._timestamps[0] >= self.period_sec:
+                self._timestamps.popleft()
+            if len(self._timestamps) >= self.max_retries:
+                return False
+            self._timestamps.append(now)
+            return True
+
+
+class CircuitBreaker:
+    """Размыкатель цепи
+
+    После failures неудачных попыток подряд цепь размыкается и в течение
+    cooldown_sec вызовы сразу завершаются исключением base.exc.CircuitOpen.
+    После cooldown_sec вызовы пропускаются: первый же успешный замыкает
+    цепь, неудачный – снова размыкает.
+    """
+
+    def __init__(self, failures: int, cooldown_sec: float = 30):
+        self.failures = failures
+        self.cooldown_sec = cooldown_sec
+        self._failed = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        opened_at = self._opened_at
+        return opened_at is not None and time.monotonic() - opened_at < self.cooldown_sec
+
+    def check(self):
+        """
+        :raises base.exc.CircuitOpen:
+        """
+        if self.is_open:
+            raise base.exc.CircuitOpen(
+                f'Цепь разомкнута после {self._failed} ошибок подряд, '
+                f'повтор не ранее чем через {self.cooldown_sec} сек')
+
+    def on_success(self):
+        with self._lock:
+            self._failed = 0
+            self._opened_at = None
+
+    def on_failure(self):
+        with self._lock:
+            self._failed += 1
+            if self._failed >= self.failures:
+                self._opened_at = time.monotonic()
+
+
 def retry_if_exception(
         exceptions: typing.Type[Exception] | collections.abc.Iterable[typing.Type[Exception]],
         *, retries: int | list[float | int] = 2,
         delay_sec: float = 0, geom_progression: float = 1,
-        extra_check: typing.Callable[[Exception], bool] = None):
+        extra_check: typing.Callable[[Exception], bool] = None,
+        jitter: bool = False,
+        budget: int | RetryBudget = None, budget_period_sec: float = 60,
+        circuit_breaker: int | CircuitBreaker = None, cooldown_sec: float = 30):
     """Декоратор, вызывающий метод/функцию повторно
 
     Работает только в случае, если поймает указанное исключение (-я).
+    Декорировать можно и корутины – тогда задержка неблокирующая (asyncio.sleep).
 
     :param exceptions:
         исключение/список исключений при которых возникает повтор
@@ -159,24 +419,78 @@ def retry_if_exception(
         исключение. Если функция вернет False – повторных вызовов не будет.
         Используется если исключение имеет что-то, например code/status,
         и нужны повторы только при определённом коде.
+    :param jitter: «full jitter» – задержка случайна от 0 до рассчитанной,
+        чтобы повторы разных вызовов не шли синхронно
+    :param budget: общий для всех вызовов декорированной функции бюджет –
+        не более budget повторов за budget_period_sec (или свой RetryBudget,
+        например общий для нескольких функций)
+    :param circuit_breaker: после стольких неудачных попыток подряд вызовы
+        в течение cooldown_sec сразу завершаются base.exc.CircuitOpen
+        (или свой CircuitBreaker)
     """
-    def decorator(func):
-
-        @functools.wraps(func)
-        def decorated_func(*args, **kwargs):
-            nonlocal delay_sec, retries
-            delays = copy.deepcopy(retries) if isinstance(retries, list) else \
-                [delay_sec * geom_progression**i for i in range(retries)]
-            while True:
-                try:
-                    return func(*args, **kwargs)
-                except exceptions as e:
-                    if not delays:
-                        raise  # все ретраи отработаны
-                    if callable(extra_check) and bool(extra_check(e)) is False:
-                        raise  # extra_check не пройден – повтора не будет
-                    time.sleep(delays.pop(0))
+    if not isinstance(exceptions, type):
+        exceptions = tuple(exceptions)
+    delays = tuple(retries) if isinstance(retries, (list, tuple)) else \
+        tuple(delay_sec * geom_progression**i for i in range(retries))
 
+    def decorator(func):
+        retry_budget = RetryBudget(budget, budget_period_sec) if isinstance(budget, int) else budget
+        breaker = CircuitBreaker(circuit_breaker, cooldown_sec) \
+            if isinstance(circuit_breaker, int) else circuit_breaker
+
+        def get_delay(e: Exception, attempt: int) -> float | None:
+            """Задержка перед повтором (None – повтора не будет)"""
+            if breaker is not None:
+                breaker.on_failure()
+            if attempt >= len(delays):
+                return None  # все ретраи отработаны
+            if callable(extra_check) and bool(extra_check(e)) is False:
+                return None  # extra_check не пройден – повтора не будет
+            if breaker is not None and breaker.is_open:
+                return None  # цепь разомкнута – повторы только добавят нагрузки
+            if retry_budget is not None and not retry_budget.acquire():
+                return None  # бюджет повторов исчерпан
+            return random.uniform(0, delays[attempt]) if jitter else delays[attempt]
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def decorated_func(*args, **kwargs):
+                attempt = 0
+                while True:
+                    if breaker is not None:
+                        breaker.check()
+                    try:
+                        result = await func(*args, **kwargs)
+                    except exceptions as e:
+                        if (delay := get_delay(e, attempt)) is None:
+                            raise
+                        attempt += 1
+                        await asyncio.sleep(delay)
+                    else:
+                        if breaker is not None:
+                            breaker.on_success()
+                        return result
+        else:
+            @functools.wraps(func)
+            def decorated_func(*args, **kwargs):
+                attempt = 0
+                while True:
+                    if breaker is not None:
+                        breaker.check()
+                    try:
+                        result = func(*args, **kwargs)
+                    except exceptions as e:
+                        if (delay := get_delay(e, attempt)) is None:
+                            raise
+                        attempt += 1
+                        time.sleep(delay)
+                    else:
+                        if breaker is not None:
+                            breaker.on_success()
+                        return result
+
+        decorated_func.retry_budget = retry_budget
+        decorated_func.circuit_breaker = breaker
         return decorated_func
 
     return decorator
@@ -273,7 +587,8 @@ class Runtime:
                 with Runtime() as _timer:
                     result = func(*args, **kwargs)
                 if on_finish is None:
-                    log.debug('function "%s": %s', func.__name__, _timer)
+                    if log.isEnabledFor(logging.DEBUG):
+                        log.debug('function "%s": %s', func.__name__, _timer)
                 else:
                     on_finish(_timer)
                 return result
@@ -282,18 +597,98 @@ class Runtime:
 
 
 class ObjectsListLookup:
+    """Поиск значения атрибута объекта из списка по значению другого атрибута
+
+    Индекс (dict) строится лениво при первом обращении, дальше поиск – O(1).
+
+    >>> lookup = ObjectsListLookup(currencies, 'code', 'name')
+    >>> lookup['RUB']
+    >>> lookup = ObjectsListLookup(rates, ('currency', 'date'), ('rate', 'nominal'))
+    >>> lookup.get(('USD', today), default=(None, None))
+
+    Если список items изменился по длине или был переприсвоен – индекс
+    перестраивается автоматически. После замены элементов «на месте»
+    (items[i] = …) или изменения атрибутов объектов нужно вызвать invalidate().
+    """
 
-    def __init__(self, items: list, obj_key_attr: str, obj_value_attr: str):
+    def __init__(
+            self, items: list,
+            obj_key_attr: str | tuple[str, ...],
+            obj_value_attr: str | tuple[str, ...] | None,
+            *, unique: bool = False):
         """
         :param items: массив объектов
-        :param obj_key_attr: атрибут-ключ объекта
+        :param obj_key_attr: атрибут-ключ объекта (кортеж атрибутов – составной ключ;
+            как и у operator.attrgetter, кортеж из одного атрибута равносилен строке)
         :param obj_value_attr: атрибут-зачение объекта
+            (кортеж атрибутов – значение-кортеж, None – сам объект)
+        :param unique: дубли ключей – ошибка (base.exc.MultipleResults),
+            иначе для дублей используется первый объект (как при линейном поиске)
         """
-        self.items = items or []
         self.obj_key_attr = obj_key_attr
         self.obj_value_attr = obj_value_attr
+        self.unique = unique
+        self.items = items
 
     def __getitem__(self, key_name) -> str | None:
-        for item in self.items:
-            if getattr(item, self.obj_key_attr) == key_name:
-                return getattr(item, self.obj_value_attr)
+        return self.get(key_name)
+
+    def __contains__(self, key_name) -> bool:
+        return key_name in self._get_index()
+
+    def __len__(self) -> int:
+        return len(self._get_index())
+
+    @property
+    def items(self) -> list:
+        return self._items
+
+    @items.setter
+    def items(self, items: list):
+        self._items = items or []
+        self.invalidate()
+
+    @property
+    def duplicates(self) -> set:
+        """Ключи, встречающиеся в items более одного раза"""
+        self._get_index()
+        return self._duplicates
+
+    def get(self, key_name, default=None):
+        return self._get_index().get(key_name, default)
+
+    def get_many(self, keys: collections.abc.Iterable, default=None) -> list:
+        index = self._get_index()
+        return [index.get(key, default) for key in keys]
+
+    def invalidate(self):
+        """Сбрасывает индекс (будет перестроен при следующем обращении)"""
+        self._index = None
+        self._indexed_len = None
+        self._duplicates = set()
+
+    def _get_index(self) -> dict:
+        if self._index is None or self._indexed_len != len(self._items):
+            self._build_index()
+        return self._index
+
+    def _build_index(self):
+        get_key = operator.attrgetter(*self._as_tuple(self.obj_key_attr))
+        get_value = operator.attrgetter(*self._as_tuple(self.obj_value_attr)) if self.obj_value_attr else None
+        index = {}
+        duplicates = set()
+        for item in self._items:
+            key = get_key(item)
+            if key in index:
+                duplicates.add(key)
+                continue
+            index[key] = item if get_value is None else get_value(item)
+        if duplicates and self.unique:
+            raise base.exc.MultipleResults(f'Дубли ключей {self.obj_key_attr}', duplicates)
+        self._index = index
+        self._indexed_len = len(self._items)
+        self._duplicates = duplicates
+
+    @staticmethod
+    def _as_tuple(attrs: str | tuple[str, ...]) -> tuple[str, ...]:
+        return (attrs,) if isinstance(attrs, str) else tuple(attrs)
@@ -0,0 +1,279 @@
+"""Микробенчмарки base.tools и конвейера обработки запроса API
+
+python bench.py [-o bench.json] [--compare prev.json] [--threshold 0.2] [-k order_view]
+
+Для каждого сценария выбирается количество вызовов (~0.2 с на замер),
+из нескольких замеров берётся лучший, результат – нс на вызов.
+Полный GET OrderView выполняется через тестовый клиент Django
+на временной (in-memory) SQLite БД.
+С --compare результаты сравниваются с сохранёнными ранее: замедление
+больше threshold (доля) – регрессия, код возврата 1.
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import pathlib
+import platform
+import sys
+import timeit
+import typing
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'conf.settings')
+os.environ['DB_REPLICAS'] = '0'  # все запросы – в тестовую БД
+os.environ['WARM_UP'] = '0'
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+import base  # noqa: E402
+from apps import api  # noqa: E402
+from apps import order  # noqa: E402
+
+Case = typing.Callable[[], typing.Any]
+
+_cases: dict[str, Case] = {}
+
+
+def case(name: str):
+    """Регистрирует сценарий (функцию без аргументов)"""
+    def decorator(func: Case) -> Case:
+        _cases[name] = func
+        return func
+    return decorator
+
+
+def measure(func: Case, repeat: int = 5, min_time: float = 0.2) -> float:
+    """Лучшее время одного вызова, нс"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e9
+
+
+# base.tools.json_response
+
+_response_dto = api.order.v2.get.response.Root(data={
+    'orders': {i: {'id': i, 'name': f'order {i}'} for i in range(50)},
+    'not_found': [],
+})
+
+
+@base.tools.json_response
+def _json_view():
+    return _response_dto
+
+
+case('json_response')(_json_view)
+
+
+# BaseApiViewController._get_request_dto
+
+_valid_request = RequestFactory().get('/api/v2/order/', {'id': list(range(1, 101))})
+_invalid_request = RequestFactory().get('/api/v2/order/', {'id': ['1', 'x', '3']})
+
+
+@case('get_request_dto_valid')
+def _get_request_dto_valid():
+    api.order.v2.get.controller.ViewController(_valid_request)
+
+
+@case('get_request_dto_invalid')
+def _get_request_dto_invalid():
+    try:
+        api.order.v2.get.controller.ViewController(_invalid_request)
+    except base.exc.ViewResponse:
+        pass
+
+
+# base.tools.ObjectsListLookup
+
+class _Rate(typing.NamedTuple):
+    currency: str
+    day: int
+    rate: float
+
+
+_rates = [_Rate(f'C{i % 100}', i // 100, i / 7) for i in range(10_000)]
+_rate_keys = [(rate.currency, rate.day) for rate in _rates[::10]]
+
+
+@case('objects_list_lookup_build')
+def _objects_list_lookup_build():
+    base.tools.ObjectsListLookup(_rates, ('currency', 'day'), 'rate').get(('C1', 0))
+
+
+_lookup = base.tools.ObjectsListLookup(_rates, ('currency', 'day'), 'rate')
+
+
+@case('objects_list_lookup_get_1000')
+def _objects_list_lookup_get():
+    for key in _rate_keys:
+        _lookup.get(key)
+
+
+# base.tools.UrlPath
+
+_url_root = base.tools.UrlPath('https://example.com/api/')
+
+
+@case('url_path_compose')
+def _url_path_compose():
+    (_url_root / 'v2' / 'order' / 12345).only_rslash
+
+
+_url_template = base.tools.UrlTemplate.of('https://example.com/api/') / 'v{version}/order/{order_id}/'
+
+
+@case('url_template_format')
+def _url_template_format():
+    _url_template.format(version=2, order_id=12345, query={'expand': 'items'})
+
+
+# base.tools.iter_exc
+
+def _deep_exception(depth: int) -> Exception:
+    """Цепочка из depth+1 исключений, связанных через __context__ (как её обходит iter_exc)"""
+    def raise_level(level: int):
+        if not level:
+            raise ValueError('root')
+        try:
+            raise_level(level - 1)
+        except Exception:
+            raise RuntimeError(f'level {level}')
+
+    try:
+        raise_level(depth)
+    except RuntimeError as e:
+        return e
+
+
+_deep_exc = _deep_exception(50)
+assert len(list(base.tools.iter_exc(_deep_exc))) == 51
+
+
+@case('iter_exc_depth_50')
+def _iter_exc():
+    list(base.tools.iter_exc(_deep_exc))
+
+
+# base.tools.retry_if_exception
+
+def _plain():
+    return 1
+
+
+_retried = base.tools.retry_if_exception(ValueError, retries=3)(_plain)
+
+
+@case('retry_if_exception_no_error')
+def _retry_no_error():
+    _retried()
+
+
+@case('plain_call')
+def _plain_call():
+    _plain()
+
+
+# OrderView GET через тестовый клиент
+
+_client = Client()
+_order_ids: list[int] = []
+_order_etag = ''
+
+
+@case('order_view_v1_get_cached')
+def _order_view_v1():
+    _client.get('/api/v1/order/', {'id': 1})
+
+
+@case('order_view_v2_get')
+def _order_view_v2():
+    _client.get('/api/v2/order/', {'id': _order_ids})
+
+
+@case('order_view_v2_get_not_modified')
+def _order_view_v2_not_modified():
+    _client.get('/api/v2/order/', {'id': _order_ids}, HTTP_IF_NONE_MATCH=_order_etag)
+
+
+def setup_db() -> str:
+    """Тестовая БД с заказами, возвращает её прежнее имя"""
+    global _order_etag
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    order.models.Order.objects.bulk_create([order.models.Order(name=f'order {i}') for i in range(20)])
+    _order_ids.extend(order.models.Order.objects.values_list('pk', flat=True))
+    _order_etag = _client.get('/api/v2/order/', {'id': _order_ids})['ETag']
+    return old_name
+
+
+def run(names: list[str], repeat: int, min_time: float) -> dict[str, float]:
+    results = {}
+    for name in names:
+        results[name] = measure(_cases[name], repeat=repeat, min_time=min_time)
+        print(f'{name:40} {results[name]:14,.0f} нс')
+    return results
+
+
+def compare(results: dict[str, float], baseline: dict[str, float], threshold: float) -> list[str]:
+    """Печатает сравнение, возвращает имена сценариев с регрессией"""
+    regressions = []
+    print(f'\n{"сценарий":40} {"было, нс":>14} {"стало, нс":>14} {"изменение":>10}')
+    for name, value in results.items():
+        if name not in baseline:
+            continue
+        change = value / baseline[name] - 1
+        mark = ''
+        if change > threshold:
+            regressions.append(name)
+            mark = '  РЕГРЕССИЯ'
+        print(f'{name:40} {baseline[name]:14,.0f} {value:14,.0f} {change:+10.1%}{mark}')
+    return regressions
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Микробенчмарки base.tools и API')
+    parser.add_argument('-o', '--output', type=pathlib.Path, help='сохранить результаты в JSON')
+    parser.add_argument('--compare', type=pathlib.Path, help='JSON с результатами предыдущего запуска')
+    parser.add_argument('--threshold', type=float, default=0.2, help='допустимое замедление (доля)')
+    parser.add_argument('-k', '--filter', default='', help='только сценарии, содержащие подстроку')
+    parser.add_argument('--repeat', type=int, default=5, help='замеров на сценарий')
+    parser.add_argument('--min-time', type=float, default=0.2, help='секунд на замер')
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)  # debug-логи конвейера не меряем
+    names = [name for name in _cases if args.filter in name]
+    setup_test_environment(debug=False)
+    old_name = setup_db()
+    try:
+        results = run(names, args.repeat, args.min_time)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    if args.output:
+        args.output.write_text(json.dumps({
+            'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'platform': platform.platform(),
+            'results': results,
+        }, indent=2))
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f'\nРегрессии (>{args.threshold:.0%}): {", ".join(regressions)}', file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""Прогрев процесса до fork воркеров (gunicorn --preload, uwsgi без lazy-apps)
+
+Вызывается из conf/wsgi.py и conf/asgi.py после создания application:
+импортирует все ленивые модули, строит urlconf, pydantic-классы DTO и их
+схемы, открывает и закрывает соединения с БД (кэши backend'ов заполняются,
+а сокеты не наследуются воркерами) и замораживает сборщик мусора
+(gc.freeze()), чтобы созданные объекты не трогались им в воркерах и
+страницы памяти оставались общими (copy-on-write).
+
+Включается переменной окружения WARM_UP=1 или settings.WARM_UP
+(окружение приоритетнее). Если выключен, но включён eager-режим base.lazy,
+выполняется только импорт модулей.
+"""
+import gc
+import logging
+import os
+
+from django import db
+from django.conf import settings
+from django.urls import get_resolver
+
+import base
+from apps import api
+
+log = logging.getLogger(__name__)
+
+
+def is_enabled() -> bool:
+    value = os.environ.get('WARM_UP')
+    if value is not None:
+        return value.lower() in ('1', 'true', 'yes', 'on')
+    return bool(getattr(settings, 'WARM_UP', False))
+
+
+def boot():
+    if is_enabled():
+        warm_up()
+    elif base.lazy.is_eager():
+        base.lazy.import_all()
+
+
+def warm_up():
+    with base.tools.Runtime() as timer:
+        modules = base.lazy.import_all()
+        resolver = get_resolver()
+        resolver.reverse_dict  # noqa: B018 (строит таблицы resolve/reverse)
+        api.base.registry.registry.autodiscover()
+        for connection in db.connections.all():
+            try:
+                connection.ensure_connection()
+            except db.Error as e:
+                log.warning('Прогрев: нет соединения с БД %s: %s', connection.alias, e)
+            finally:
+                connection.close()
+        gc.collect()
+        gc.freeze()
+    log.info(
+        'Прогрев: %s модулей, %s объектов заморожено, %s',
+        modules, gc.get_freeze_count(), timer)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 import logging
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -49,6 +50,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.api.base.middleware.ApiTimingMiddleware',
+    'base.db_router.ReplicaPinMiddleware',
 ]
 
 ROOT_URLCONF = 'conf.urls'
@@ -82,6 +85,44 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения (base.db_router.ReplicaRouter).
+# Локально: DB_REPLICAS=2 → db_replica_1.sqlite3, db_replica_2.sqlite3 – копии primary:
+# sqlite3 db.sqlite3 ".backup db_replica_1.sqlite3"
+DATABASE_REPLICAS = [f'replica_{i}' for i in range(1, int(os.environ.get('DB_REPLICAS', 0)) + 1)]
+for _alias in DATABASE_REPLICAS:
+    DATABASES[_alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'db_{_alias}.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['base.db_router.ReplicaRouter']
+
+# Сколько секунд после записи читать из primary (задержка репликации)
+REPLICA_LAG_SEC = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Кэш ответов API (base.cache.ResponseCache(backend='api'))
+    'api': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'api',
+        # Общий для всех процессов вариант (локально):
+        # 'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        # 'LOCATION': BASE_DIR / '.cache' / 'api',
+        'TIMEOUT': 30,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10_000,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -132,17 +173,37 @@ LOGGING = {
                 '[%(funcName)s()] [%(name)s]',
             )),
         },
+        'json': {
+            '()': 'base.log.JsonFormatter',
+        },
+    },
+    'filters': {
+        # Частые debug-сообщения (Runtime.decorator и т.п.): не более 10/с от логгера
+        'rate_limit_debug': {
+            '()': 'base.log.RateLimitFilter',
+            'rate': 10,
+        },
     },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
-            'formatter': 'console',
+            # LOG_FORMAT=json – структурированный вывод
+            'formatter': os.environ.get('LOG_FORMAT', 'console'),
+        },
+        # Неблокирующая запись: форматирование и вывод – в фоновом потоке
+        'queue': {
+            '()': 'base.log.QueueHandler',
+            'handlers': ['cfg://handlers.console'],
+            'maxsize': 10_000,
         },
     },
     'loggers': {
         '': {
             'level': 'DEBUG',
-            'handlers': ['console'],
+            'handlers': ['queue'],
+        },
+        'base.tools': {
+            'filters': ['rate_limit_debug'],
         },
         'django.utils.autoreload': {
             'level': 'INFO',
@@ -159,3 +220,15 @@ LOGGING = {
         },
     },
 }
+
+# Импортировать все ленивые подмодули пакетов при старте воркера (base.lazy);
+# переменная окружения LAZY_IMPORT_EAGER приоритетнее
+LAZY_IMPORT_EAGER = not DEBUG
+
+# Прогрев процесса до fork воркеров и gc.freeze() (conf/boot.py);
+# переменная окружения WARM_UP приоритетнее
+WARM_UP = not DEBUG
+
+# Сериализатор JSON API-ответов (см. base.tools.json_dumps).
+# По умолчанию – orjson, если он установлен, иначе json из stdlib.
+# JSON_DUMPS = 'base.tools.stdlib_json_dumps'
@@ -15,7 +15,12 @@ def main():
             "available on your PYTHONPATH environment variable? Did you "
             "forget to activate a virtual environment?"
         ) from exc
-    execute_from_command_line(sys.argv)
+    from base import db_router
+
+    # Команды (migrate, воркеры) читают из primary: реплики могут отставать.
+    # Запросы runserver обрабатываются в потоках со своим контекстом и идут в реплики
+    with db_router.use_primary():
+        execute_from_command_line(sys.argv)
 
 
 if __name__ == '__main__':
@@ -1,5 +1,11 @@
 """Конвертирует XSD в pydantic-DTO
 
+python _xsd_to_pydantic.py DP_TOVTORGPOK.xsd -o dto_xml.py [--target v2]
+
+Результат кэшируется на диске по хэшу содержимого XSD (неизменившуюся схему
+повторно не разбираем), код типов – по хэшу их определений, поэтому после
+правки XSD перегенерируются только изменившиеся типы.
+
 https://xmlschema.readthedocs.io/en/latest/
 
 https://pypi.org/project/transliterate/
@@ -7,18 +13,25 @@ https://pypi.org/project/cyrtranslit/
 
 https://pydash.readthedocs.io/en/latest/
 """
-import datetime
-import itertools
+import argparse
+import hashlib
+import io
+import json
+import pathlib
+import sys
 import typing
+import xml.etree.ElementTree as ElementTree
 
 import cyrtranslit
 import pydash.strings
-import pytz
 import xmlschema
 
 ROOT_CLASS = 'upd.dto_xml.XmlBaseModel'
 BASE_CLASS = 'XmlBaseClass'
-XSD_PATH = '/Users/roveek/Downloads/XSD_NAKLADNAYA/DP_TOVTORGPOK.xsd'
+CACHE_DIR = pathlib.Path.home() / '.cache' / 'xsd_to_pydantic'
+GENERATOR_VERSION = '2'  # увеличивать при изменении генерируемого кода (сбрасывает кэш)
+TARGETS = ('v1', 'v2')
+TARGET = 'v1'  # v1 – pydantic 1.x (Config, min_items, regex), v2 – pydantic 2 (Annotated, pattern, model_config)
 ATTR_TYPE_MAP = {
     'xs:integer': 'int',
     'xs:string': 'str',
@@ -43,11 +56,28 @@ def get_py_type(xsd_type: str) -> str:
         return py_type
 
 
+def optional(py_type: str) -> str:
+    return f'{py_type} | None' if TARGET == 'v2' else f'typing.Optional[{py_type}]'
+
+
+def list_of(py_type: str) -> str:
+    return f'list[{py_type}]' if TARGET == 'v2' else f'typing.List[{py_type}]'
+
+
+def named_simple_type(xsd_type) -> str | None:
+    """Имя набора ограничений (простого типа из XSD); None – тип встроенный или анонимный"""
+    if not xsd_type.name or isinstance(xsd_type, xmlschema.validators.XsdAtomicBuiltin):
+        return None
+    return transliterate(xsd_type.name)
+
+
 def process_simple_type(obj: xmlschema.validators.XsdAtomicRestriction) -> str:
     """Набор ограничений для простого поля"""
 
     if not isinstance(obj, xmlschema.validators.XsdAtomicRestriction):
         raise TypeError(f'Wrong type {obj.__class__}')
+    if TARGET == 'v2':
+        return process_simple_type_v2(obj)
 
     name = transliterate(obj.name)
     result = [
@@ -65,21 +95,50 @@ def process_simple_type(obj: xmlschema.validators.XsdAtomicRestriction) -> str:
     return '\n'.join(result)
 
 
+def process_simple_type_v2(obj: xmlschema.validators.XsdAtomicRestriction) -> str:
+    """Простой тип с ограничениями (pydantic 2: typing.Annotated)"""
+
+    name = transliterate(obj.name)
+    constraints = []
+    if obj.min_length:
+        constraints += [f'min_length={obj.min_length}']
+    if obj.max_length:
+        constraints += [f'max_length={obj.max_length}']
+    if obj.patterns and obj.patterns.regexps:
+        # Шаблоны XSD описывают значение целиком
+        constraints += [f"pattern=r'^(?:{obj.patterns.regexps[0]})$'"]
+    result = [
+        f'{name} = typing.Annotated[',
+        f'{S}# {obj.name} ({obj.sequence_type})',
+        f'{S}# {obj.annotation!s}',
+        f'{S}{ATTR_TYPE_MAP.get(obj.sequence_type, "str")},',
+    ]
+    if constraints:
+        result += [f'{S}pydantic.Field({", ".join(constraints)}),']
+    result += [']']
+    return '\n'.join(result)
+
+
 def process_simple_attribute(obj: xmlschema.validators.XsdAttribute) -> str:
     """Простое поле"""
 
     name = transliterate(obj.name)
     name = pydash.strings.snake_case(name)
     py_type = get_py_type(obj.type.sequence_type)
+    type_name = named_simple_type(obj.type)
     comment = []
 
     is_required = obj.use == 'required'
     has_enumeration = isinstance(obj.type.enumeration, list) and obj.type.enumeration
 
-    if not is_required:
-        py_type = f'typing.Optional[{py_type}]'
+    if TARGET == 'v2' and type_name:
+        py_type = type_name  # ограничения уже в typing.Annotated
     if has_enumeration:
         py_type = f'typing.Literal{obj.type.enumeration}'
+        if not is_required and TARGET == 'v2':
+            py_type = optional(py_type)
+    elif not is_required:
+        py_type = optional(py_type)
     comment.append(f'use={obj.use}')
     result = [
         f'{S}{name}: {py_type} = pydantic.Field(',
@@ -90,7 +149,7 @@ def process_simple_attribute(obj: xmlschema.validators.XsdAttribute) -> str:
         result += [f'{S*2}default=None,']
     elif len(obj.type.enumeration or []) == 1:
         result += [f"{S*2}default='{obj.type.enumeration[0]}',"]
-    if not obj.type.name:
+    if not type_name:
         # Наборы ограничений (типа ОКСМТип) уже содержат ограничения длины
         if not has_enumeration:
             # С typing.Literal min_length/max_length не работают
@@ -98,8 +157,8 @@ def process_simple_attribute(obj: xmlschema.validators.XsdAttribute) -> str:
                 result += [f'{S*2}min_length={obj.type.simple_type.min_length},']
             if obj.type.simple_type.max_length:
                 result += [f'{S*2}max_length={obj.type.simple_type.max_length},']
-    else:
-        result += [f'{S*2}**{transliterate(obj.type.name)},']
+    elif TARGET == 'v1':
+        result += [f'{S*2}**{type_name},']
     if comment:
         comment = '  # %s' % ' • '.join(comment)
     result += [f'{S}){comment or ""}']
@@ -118,26 +177,42 @@ def process_complex_attribute(obj: xmlschema.XsdElement) -> str:
     default = None
     min_items = None
     max_items = None
+    is_list = max_occurs == '∞' or max_occurs > 1
+    # Ограничения длины значения простого типа (в v2 для списков – на элементах)
+    length_constraints = []
+    if obj.type.is_simple():
+        if obj.type.simple_type.min_length is not None:
+            length_constraints += [f'min_length={obj.type.simple_type.min_length}']
+        if obj.type.simple_type.max_length is not None:
+            length_constraints += [f'max_length={obj.type.simple_type.max_length}']
 
     if obj.type.is_simple():
         py_type = get_py_type(obj.type.sequence_type)
+        if TARGET == 'v2' and named_simple_type(obj.type.simple_type):
+            py_type = named_simple_type(obj.type.simple_type)
+            length_constraints = []  # уже в typing.Annotated
+        elif TARGET == 'v2' and is_list and length_constraints:
+            py_type = f'typing.Annotated[{py_type}, pydantic.Field({", ".join(length_constraints)})]'
+            length_constraints = []
     elif obj.type.name:
         py_type = transliterate(obj.type.name)
     else:
         py_type = name
 
-    if max_occurs == '∞' or max_occurs > 1:
-        py_type = f'typing.List[{py_type}]'
+    if is_list:
+        py_type = list_of(py_type)
         default_factory = 'default_factory=list'
         force_list.append(obj.name)
+        # В v2 ограничения количества элементов списка – min_length/max_length
+        items_prefix = 'length' if TARGET == 'v2' else 'items'
         if min_occurs > 0:
             # Ограничения min_items/max_items только для списков
-            min_items = f'min_items={min_occurs}'
+            min_items = f'min_{items_prefix}={min_occurs}'
         if str(max_occurs).isdecimal() and max_occurs > 0:
             # При max_occurs == '∞': max_items не указываем
-            max_items = f'max_items={max_occurs}'
+            max_items = f'max_{items_prefix}={max_occurs}'
     if min_occurs < 1 or obj.parent.model == 'choice':
-        py_type = f'typing.Optional[{py_type}]'
+        py_type = optional(py_type)
         default = 'None'
         if obj.parent.model == 'choice':
             comment += [f'{obj.parent.model=} → Optional']
@@ -156,11 +231,8 @@ def process_complex_attribute(obj: xmlschema.XsdElement) -> str:
         result += [f'{S*2}{min_items},']
     if max_items:
         result += [f'{S*2}{max_items},']
-    if obj.type.is_simple():
-        if obj.type.simple_type.min_length is not None:
-            result += [f'{S*2}min_length={obj.type.simple_type.min_length},']
-        if obj.type.simple_type.max_length is not None:
-            result += [f'{S*2}max_length={obj.type.simple_type.max_length},']
+    for constraint in length_constraints:
+        result += [f'{S*2}{constraint},']
     comment = '  # %s' % ' • '.join(comment)
     result += [f'{S}){comment}']
     return '\n'.join(result)
@@ -204,8 +276,11 @@ def process_xsd_element(
 def base_class() -> str:
     result = [
         f'class XmlBaseClass({ROOT_CLASS}):',
-        f'    pass',
     ]
+    if TARGET == 'v2':
+        result += ['    model_config = pydantic.ConfigDict(populate_by_name=True)']
+    else:
+        result += ['    pass']
     return '\n'.join(result)
 
 
@@ -221,27 +296,178 @@ def main_wrapper() -> str:
         f'    @staticmethod',
         f'    def xmltodict_force_list() -> tuple:',
         f'        """Возвращает список атрибутов, которые xmltodict должен заворачивать в списки"""',
-        f'        return tuple({force_list})',
+        f'        return {tuple(dict.fromkeys(force_list))}',
     ]
     return '\n'.join(result)
 
 
-if __name__ == '__main__':
-
-    xsd = xmlschema.XMLSchema(XSD_PATH)
-
-    print('"""\nGenerated at %s\n"""' % datetime.datetime.now(tz=pytz.utc), end='\n'*2)
-    print('import pydantic')
-    print('import typing')
-    print('from apps import upd')
-    print('\n')
-
-    print(*map(process_simple_type, xsd.simple_types), sep='\n', end='\n'*3)
-
-    print(base_class(), end='\n'*3)
-
-    print(*itertools.chain.from_iterable(map(process_xsd_element, xsd.complex_types)), sep='\n'*3, end='\n'*3)
+class FragmentCache:
+    """Кэш сгенерированного кода типов (по хэшу их XSD-определения)
+
+    Повторная генерация нужна только типам, определение которых изменилось.
+    """
+
+    def __init__(self, path: pathlib.Path | None):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._data = {}
+        self._used = {}
+        if path and path.exists():
+            try:
+                self._data = json.loads(path.read_text(encoding='utf-8'))
+            except ValueError:
+                print(f'Битый кэш {path}, игнорируем', file=sys.stderr)
+
+    def get_or_generate(self, key: str, definition_hash: str,
+                        generate: typing.Callable[[], str]) -> str:
+        entry = self._data.get(key)
+        if entry and entry['hash'] == definition_hash:
+            self.hits += 1
+            force_list.extend(entry['force_list'])
+        else:
+            self.misses += 1
+            start = len(force_list)
+            entry = {
+                'hash': definition_hash,
+                'code': generate(),
+                'force_list': force_list[start:],
+            }
+        self._used[key] = entry
+        return entry['code']
+
+    def save(self):
+        """Сохраняет использованные в этом запуске фрагменты"""
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self._used, ensure_ascii=False, sort_keys=True), encoding='utf-8')
+
+
+def definition_hash(obj: xmlschema.validators.XsdComponent, *extra: str) -> str:
+    """Хэш XSD-определения компонента (и всего, от чего зависит его код)"""
+    digest = hashlib.sha256(GENERATOR_VERSION.encode())
+    for part in (TARGET, BASE_CLASS, *extra):
+        digest.update(part.encode())
+    digest.update(ElementTree.tostring(obj.elem))
+    return digest.hexdigest()
+
+
+def used_simple_types(obj, result: dict[str, xmlschema.validators.XsdSimpleType] = None) -> dict:
+    """Именованные простые типы, от которых зависит код компонента: {имя: тип}
+
+    Обход – как в process_xsd_element() (анонимные вложенные типы – в том же
+    фрагменте), для каждого простого типа – и его базовые типы.
+    """
+    if result is None:
+        result = {}
+
+    def add(xsd_type):
+        if xsd_type is None or isinstance(xsd_type, xmlschema.validators.XsdAtomicBuiltin):
+            return
+        if xsd_type.name:
+            if xsd_type.name in result:
+                return
+            result[xsd_type.name] = xsd_type
+        add(getattr(xsd_type, 'base_type', None))
+        add(getattr(xsd_type, 'item_type', None))
+        for member_type in getattr(xsd_type, 'member_types', None) or ():
+            add(member_type)
+
+    for attr in obj.attributes.values():
+        add(attr.type)
+    elements = obj.content if isinstance(obj, xmlschema.validators.XsdComplexType) else obj
+    for element in elements:
+        if element.type.is_simple():
+            add(element.type)
+        elif not element.type.name:
+            used_simple_types(element, result)  # у именованного сложного типа – свой фрагмент
+    return result
+
+
+def generate(xsd: xmlschema.XMLSchema, source: str, fragments: FragmentCache) -> str:
+    """Код pydantic-моделей по XSD
+
+    Результат детерминирован (без дат и прочего), чтобы diff'ы были минимальными.
+    """
+    force_list.clear()
+    simple_types = list(xsd.simple_types)
+
+    def fragment(kind: str, obj) -> str:
+        # Код сложного типа зависит и от используемых им простых (ограничения длины и т.п.),
+        # но не от остальных: правка одного простого типа не перегенерирует всё
+        used = used_simple_types(obj)
+        used_hash = hashlib.sha256(b''.join(
+            name.encode() + ElementTree.tostring(used[name].elem) for name in sorted(used))).hexdigest()
+        return fragments.get_or_generate(
+            f'{kind}:{obj.name}', definition_hash(obj, used_hash),
+            lambda: '\n\n\n'.join(process_xsd_element(obj)))
+
+    out = io.StringIO()
+    print(f'"""\nGenerated by {pathlib.Path(__file__).name} from {source}\n"""', end='\n'*2, file=out)
+    print('import pydantic', file=out)
+    print('import typing', file=out)
+    root_module = ROOT_CLASS.partition('.')[0]
+    if root_module != 'pydantic':
+        print(f'from apps import {root_module}', file=out)
+    print('\n', file=out)
+
+    print(*map(process_simple_type, simple_types), sep='\n', end='\n'*3, file=out)
+
+    print(base_class(), end='\n'*3, file=out)
+
+    print(*(fragment('complex', obj) for obj in xsd.complex_types), sep='\n'*3, end='\n'*3, file=out)
+
+    print(*(fragment('element', obj) for obj in xsd), sep='\n'*3, end='\n'*3, file=out)
+
+    print(main_wrapper(), file=out)
+    return out.getvalue()
+
+
+def main(argv: list[str] = None):
+    global ROOT_CLASS, TARGET
+
+    parser = argparse.ArgumentParser(description='Конвертирует XSD в pydantic-DTO')
+    parser.add_argument('xsd', type=pathlib.Path, help='путь к XSD')
+    parser.add_argument('-o', '--output', type=pathlib.Path, help='куда записать модели (по умолчанию stdout)')
+    parser.add_argument('--root-class', default=ROOT_CLASS, help=f'базовый класс моделей ({ROOT_CLASS})')
+    parser.add_argument('--target', choices=TARGETS, default=TARGET, help=f'версия pydantic ({TARGET})')
+    parser.add_argument('--cache-dir', type=pathlib.Path, default=CACHE_DIR, help=f'кэш ({CACHE_DIR})')
+    parser.add_argument('--no-cache', action='store_true', help='не использовать кэш')
+    args = parser.parse_args(argv)
+
+    ROOT_CLASS = args.root_class
+    TARGET = args.target
+    cache_dir = None if args.no_cache else args.cache_dir
+    xsd_path = args.xsd.resolve()
+    content_hash = hashlib.sha256(xsd_path.read_bytes()).hexdigest()
+    source = f'{xsd_path.name} (sha256 {content_hash[:16]})'
+
+    # XSD не менялась – схему не разбираем вовсе (разобранная xmlschema-схема
+    # после pickle теряет часть аннотаций, поэтому кэшируется результат)
+    output_key = hashlib.sha256('\0'.join((GENERATOR_VERSION, TARGET, ROOT_CLASS, source)).encode()).hexdigest()
+    cached_output = cache_dir / f'{output_key[:32]}.py' if cache_dir else None
+    if cached_output and cached_output.exists():
+        code = cached_output.read_text(encoding='utf-8')
+        print(f'{source} не изменилась, результат из кэша', file=sys.stderr)
+    else:
+        xsd = xmlschema.XMLSchema(str(xsd_path))
+        path_hash = hashlib.sha1(str(xsd_path).encode()).hexdigest()[:12]
+        # Свой файл на каждую версию pydantic: save() оставляет только фрагменты
+        # текущего запуска и иначе затирал бы фрагменты другой версии
+        fragments_name = f'{xsd_path.stem}-{path_hash}-{TARGET}.fragments.json'
+        fragments = FragmentCache(cache_dir / fragments_name if cache_dir else None)
+        code = generate(xsd, source, fragments)
+        fragments.save()
+        if cached_output:
+            cached_output.write_text(code, encoding='utf-8')
+        print(f'Типы: {fragments.misses} сгенерировано, {fragments.hits} из кэша', file=sys.stderr)
+
+    if args.output is None:
+        sys.stdout.write(code)
+    elif not args.output.exists() or args.output.read_text(encoding='utf-8') != code:
+        args.output.write_text(code, encoding='utf-8')
 
-    print(*itertools.chain.from_iterable(map(process_xsd_element, xsd)), sep='\n'*3, end='\n'*3)
 
-    print(main_wrapper())
+if __name__ == '__main__':
+    main()
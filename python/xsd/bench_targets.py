@@ -0,0 +1,73 @@
+"""Сравнение скорости валидации моделей, сгенерированных для pydantic 1 и 2
+
+python bench_targets.py DP_TOVTORGPOK.xsd sample.xml [--number 200]
+
+Модели генерируются из XSD обоими вариантами (--target v1/v2)
+от pydantic.BaseModel. v1-модели выполняются через pydantic.v1
+(совместимость, входящая в pydantic 2), v2 – нативным ядром.
+XML разбирается в dict один раз, замеряется только валидация.
+"""
+import argparse
+import contextlib
+import importlib.util
+import pathlib
+import sys
+import tempfile
+import timeit
+
+import pydantic
+import pydantic.v1
+import xmltodict
+
+import _xsd_to_pydantic
+
+
+@contextlib.contextmanager
+def pydantic_module(module):
+    """Подменяет import pydantic (для исполнения v1-моделей под pydantic 2)"""
+    original = sys.modules['pydantic']
+    sys.modules['pydantic'] = module
+    try:
+        yield
+    finally:
+        sys.modules['pydantic'] = original
+
+
+def build_models(xsd_path: pathlib.Path, target: str, directory: pathlib.Path):
+    """Генерирует и импортирует модели указанного варианта"""
+    output = directory / f'models_{target}.py'
+    _xsd_to_pydantic.main([
+        str(xsd_path), '-o', str(output), '--no-cache',
+        '--target', target, '--root-class', 'pydantic.BaseModel'])
+    spec = importlib.util.spec_from_file_location(output.stem, output)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[output.stem] = module
+    with pydantic_module(pydantic.v1 if target == 'v1' else pydantic):
+        spec.loader.exec_module(module)
+    return module.Xml
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description='Скорость валидации: pydantic 1 vs 2')
+    parser.add_argument('xsd', type=pathlib.Path, help='XSD')
+    parser.add_argument('xml', type=pathlib.Path, help='пример документа')
+    parser.add_argument('--number', type=int, default=100, help='количество валидаций')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        xml_v1 = build_models(args.xsd, 'v1', pathlib.Path(directory))
+        xml_v2 = build_models(args.xsd, 'v2', pathlib.Path(directory))
+
+    data = xmltodict.parse(args.xml.read_bytes(), force_list=xml_v2.xmltodict_force_list())
+    size_mb = args.xml.stat().st_size / 2**20
+    results = {}
+    for target, validate in (('v1', xml_v1.parse_obj), ('v2', xml_v2.model_validate)):
+        validate(data)  # прогрев и проверка, что документ валиден
+        seconds = min(timeit.repeat(lambda: validate(data), number=args.number, repeat=3))
+        results[target] = args.number / seconds
+        print(f'{target}: {results[target]:10.1f} док/с  {results[target] * size_mb:8.2f} МБ/с')
+    print(f'v2 быстрее v1 в {results["v2"] / results["v1"]:.1f} раз')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""Параллельная валидация множества XML-документов сгенерированными моделями
+
+python validate_bulk.py dto_xml.py /path/to/upd/ [--workers 8] [--chunk-size 16] [--max-failures 10]
+
+Источник – каталог (рекурсивно *.xml) или архив (.zip, .tar, .tar.gz).
+Файлы каталога и zip процессы читают сами, tar (сжатый gzip'ом поток
+без произвольного доступа) читает по порядку основной процесс и передаёт
+содержимое. Документы валидируются в пуле процессов классом Xml из модуля моделей,
+сгенерированного _xsd_to_pydantic.py. Выводятся ошибки по файлам
+и общая производительность (док/с, МБ/с).
+"""
+import argparse
+import functools
+import multiprocessing
+import os
+import pathlib
+import sys
+import tarfile
+import threading
+import time
+import typing
+import zipfile
+
+import xmltodict
+
+import xml_stream
+
+# (архив или None, путь к файлу/имя в архиве, содержимое – для tar, иначе None)
+Task = tuple[str | None, str, bytes | None]
+# (имя, размер в байтах, текст ошибки или None)
+Result = tuple[str, int, str | None]
+
+_xml_class = None
+_force_list = ()
+
+
+def iter_tasks(source: pathlib.Path) -> typing.Iterator[Task]:
+    if source.is_dir():
+        for path in sorted(source.rglob('*.xml')):
+            yield None, str(path), None
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for name in archive.namelist():
+                if name.lower().endswith('.xml'):
+                    yield str(source), name, None
+    elif tarfile.is_tarfile(source):
+        # Чтение по порядку: extractfile() в случайном порядке (в процессах)
+        # распаковывал бы .tar.gz каждый раз с начала
+        with tarfile.open(source) as archive:
+            for member in archive:
+                if member.isfile() and member.name.lower().endswith('.xml'):
+                    yield str(source), member.name, archive.extractfile(member).read()
+    else:
+        yield None, str(source), None
+
+
+def iter_bounded(
+        tasks: typing.Iterable[Task], slots: threading.Semaphore, stop: threading.Event) -> typing.Iterator[Task]:
+    """Задачи не быстрее, чем освобождаются slots
+
+    pool.imap_unordered() забирает задачи без ограничений, т.е. без этого
+    содержимое всего tar-архива оказалось бы в памяти.
+    """
+    for task in tasks:
+        while not slots.acquire(timeout=0.1):
+            if stop.is_set():
+                return
+        yield task
+
+
+@functools.lru_cache(maxsize=8)
+def open_archive(archive_path: str) -> zipfile.ZipFile:
+    """Архив открывается (и индексируется) один раз на процесс"""
+    return zipfile.ZipFile(archive_path)
+
+
+def read_task(task: Task) -> bytes:
+    archive_path, name, content = task
+    if content is not None:
+        return content
+    if archive_path is None:
+        return pathlib.Path(name).read_bytes()
+    return open_archive(archive_path).read(name)
+
+
+def init_worker(models_path: str):
+    """Модели импортируются один раз на процесс"""
+    global _xml_class, _force_list
+    _xml_class = xml_stream.load_module(models_path).Xml
+    _force_list = _xml_class.xmltodict_force_list()
+
+
+def validate_task(task: Task) -> Result:
+    name = task[1] if task[0] is None else f'{task[0]}:{task[1]}'
+    size = 0
+    try:
+        content = read_task(task)
+        size = len(content)
+        data = xmltodict.parse(content, force_list=_force_list)
+        validate = getattr(_xml_class, 'model_validate', None) or _xml_class.parse_obj  # pydantic v2/v1
+        validate(data)
+    except Exception as e:
+        return name, size, f'{e.__class__.__name__}: {e}'
+    return name, size, None
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Параллельная валидация XML-документов')
+    parser.add_argument('models', help='модуль моделей, сгенерированный _xsd_to_pydantic.py')
+    parser.add_argument('source', type=pathlib.Path, help='каталог или архив (.zip/.tar[.gz]) с XML')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='процессов (по числу CPU)')
+    parser.add_argument('--chunk-size', type=int, default=16, help='документов на одну передачу в процесс')
+    parser.add_argument('--max-failures', type=int, default=0, help='остановиться после N ошибок (0 – не)')
+    args = parser.parse_args(argv)
+
+    # В работе (переданы в пул и ещё без результата) – не больше slots задач
+    slots = threading.Semaphore(args.workers * args.chunk_size * 4)
+    stop = threading.Event()
+    tasks = iter_bounded(iter_tasks(args.source), slots, stop)
+    total_bytes = 0
+    processed = 0
+    failures = 0
+    started = time.perf_counter()
+    with multiprocessing.Pool(args.workers, initializer=init_worker, initargs=(args.models,)) as pool:
+        for name, size, error in pool.imap_unordered(validate_task, tasks, chunksize=args.chunk_size):
+            slots.release()
+            processed += 1
+            total_bytes += size
+            if error is None:
+                continue
+            failures += 1
+            print(f'FAIL {name}\n  ' + error.replace('\n', '\n  '))
+            if args.max_failures and failures >= args.max_failures:
+                print(f'Остановлено после {failures} ошибок', file=sys.stderr)
+                stop.set()
+                pool.terminate()
+                break
+    seconds = time.perf_counter() - started or 1e-9
+
+    print(
+        f'Документов: {processed}, ошибок: {failures}, '
+        f'{seconds:.2f} с, {processed / seconds:.1f} док/с, '
+        f'{total_bytes / 2**20 / seconds:.2f} МБ/с ({args.workers} процессов)')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""Потоковая загрузка огромных XML-документов (УПД и пр.) в pydantic-модели
+
+Документ читается инкрементально (xml.etree.ElementTree.iterparse).
+Повторяющиеся под-элементы (например строки товаров) по одному
+преобразуются в dict в формате xmltodict, валидируются сгенерированным
+_xsd_to_pydantic.py классом, отдаются и сразу удаляются из дерева,
+поэтому память не растёт с размером документа.
+
+>>> for item in iter_validated('upd.xml', 'Файл/Документ/ТаблСчФакт/СведТов', SvedTov,
+>>>                            force_list=Xml.xmltodict_force_list()):
+>>>     ...
+
+Запуск из консоли (генерированные модели – в models.py):
+python xml_stream.py upd.xml Файл/Документ/ТаблСчФакт/СведТов models.py:SvedTov
+"""
+import argparse
+import importlib.util
+import pathlib
+import sys
+import typing
+import xml.etree.ElementTree as ElementTree
+
+import pydantic
+
+Source = str | pathlib.Path | typing.BinaryIO
+
+
+def local_name(tag: str) -> str:
+    """Имя тега без namespace ({ns}Тег → Тег)"""
+    return tag.rpartition('}')[2]
+
+
+def element_to_dict(
+        elem: ElementTree.Element,
+        force_list: typing.Container[str] = ()) -> dict | str | None:
+    """Элемент → dict в формате xmltodict
+
+    Атрибуты – '@имя', текст элемента с атрибутами/детьми – '#text',
+    повторяющиеся (и указанные в force_list) теги – списки.
+    """
+    result = {f'@{local_name(name)}': value for name, value in elem.attrib.items()}
+    repeated = set()
+    for child in elem:
+        tag = local_name(child.tag)
+        value = element_to_dict(child, force_list)
+        if tag not in result:
+            result[tag] = [value] if tag in force_list else value
+            continue
+        if tag not in repeated and tag not in force_list:
+            result[tag] = [result[tag]]
+            repeated.add(tag)
+        result[tag].append(value)
+    text = (elem.text or '').strip()
+    if text:
+        if not result:
+            return text
+        result['#text'] = text
+    return result or None
+
+
+def iter_elements(source: Source, path: str) -> typing.Iterator[ElementTree.Element]:
+    """Генератор элементов по пути (Файл/Документ/…) без загрузки документа целиком
+
+    Отданный элемент после возврата управления удаляется из дерева,
+    поэтому ссылки на него (и его детей) хранить нельзя. Остальные
+    завершённые элементы вне искомых (в т.ч. родители искомых при
+    вложенном пути) удаляются сразу, в дереве остаются только
+    открытые предки текущего элемента.
+    """
+    target = tuple(path.strip('/').split('/'))
+    tags = []
+    elems = []
+    in_target = False
+    for event, elem in ElementTree.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            tags.append(local_name(elem.tag))
+            elems.append(elem)
+            if not in_target and len(tags) == len(target) and tuple(tags) == target:
+                in_target = True
+            continue
+        is_target = in_target and len(tags) == len(target)
+        if is_target:
+            yield elem
+            in_target = False
+        if is_target or not in_target:
+            # Элемент завершён и не входит в ещё собираемый искомый
+            if len(elems) > 1:
+                elems[-2].remove(elem)
+            else:
+                elem.clear()
+        tags.pop()
+        elems.pop()
+
+
+def iter_validated(
+        source: Source, path: str, model: type[pydantic.BaseModel],
+        force_list: typing.Iterable[str] = ()) -> typing.Iterator[pydantic.BaseModel]:
+    """Генератор провалидированных моделей элементов по пути
+
+    :param source: путь к файлу или бинарный файловый объект
+    :param path: путь до повторяющегося элемента (Файл/Документ/ТаблСчФакт/СведТов)
+    :param model: сгенерированный класс этого элемента
+    :param force_list: теги, которые всегда списки (Xml.xmltodict_force_list())
+    :raises pydantic.ValidationError:
+    """
+    force_list = frozenset(force_list)
+    validate = getattr(model, 'model_validate', None) or model.parse_obj  # pydantic v2/v1
+    for elem in iter_elements(source, path):
+        yield validate(element_to_dict(elem, force_list) or {})
+
+
+def load_module(path: str | pathlib.Path):
+    """Импортирует модуль (например сгенерированные модели) по пути к файлу"""
+    path = pathlib.Path(path)
+    module_spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(module_spec)
+    sys.modules[path.stem] = module
+    module_spec.loader.exec_module(module)
+    return module
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description='Потоковая валидация повторяющихся элементов XML')
+    parser.add_argument('xml', help='XML-документ')
+    parser.add_argument('path', help='путь до элемента, например Файл/Документ/ТаблСчФакт/СведТов')
+    parser.add_argument('model', help='класс элемента: путь/к/models.py:Класс')
+    args = parser.parse_args(argv)
+
+    module_path, _, class_name = args.model.rpartition(':')
+    module = load_module(module_path)
+    xml_class = getattr(module, 'Xml', None)
+    force_list = xml_class.xmltodict_force_list() if xml_class else ()
+    count = 0
+    for _ in iter_validated(args.xml, args.path, getattr(module, class_name), force_list):
+        count += 1
+    print(f'{args.path}: {count} валидных элементов')
+
+
+if __name__ == '__main__':
+    main()